@@ -1,24 +1,343 @@
 import os
 import sys
+import json
+import math
+import mmap
+import time
+import struct
+import hashlib
 import subprocess
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import namedtuple, OrderedDict, deque
 from pathlib import Path
+from types import SimpleNamespace
 
 # Constants
 PKG_DIR = Path(__file__).resolve().parent / "_1626_pkgs"
 ASSETS_DIR = Path(__file__).resolve().parent / "_1626_pkgs" / "zuoyuequ_assets"
+STORE_DIR = PKG_DIR / "store" # One pip --target tree per requirement line, named by its hash
+ACTIVE_FILE = PKG_DIR / "active.json" # Store keys currently on sys.path; swapped atomically
+WHEEL_CACHE = Path(__file__).resolve().parent / "_1626_wheels" # Survives PKG_DIR being wiped
+BASE_URL = os.environ.get("ZUOYUEQU_BASE_URL", "https://zuoyuequ.trillion-won.com").rstrip("/")
+ASSETS = ["new_score.svg", "quarter_note_up.svg", "quarter_note_down.svg", "treble.svg"]
+ASSET_MANIFEST = ASSETS_DIR / "assets.json"
+ASSET_TTL = 6 * 60 * 60 # Seconds a verified asset is trusted without asking the server again
+SCRIPT_NAME = "1626_조원.py"
+MANIFEST_NAME = "manifest.json"
+UPDATE_STATE = ASSETS_DIR / "update.json"
+STAGED_SCRIPT = ASSETS_DIR / "staged_script.py"
+UPDATE_TTL = 6 * 60 * 60 # Seconds between background update checks in offline-first mode
+SCORES_DIR = Path(__file__).resolve().parent / "1626_scores" # Saved and autosaved .zyq scores
+LIBRARY_DIR = Path(__file__).resolve().parent / "_1626_library" # Home tab index and thumbnails; safe to delete
+KEY_BINDINGS_FILE = Path(__file__).resolve().parent / "1626_keys.json" # Optional overrides, e.g. {"K": "UP", "Esc": null}
+DEFAULT_KEY_BINDINGS = {
+    "Up": "UP", "Down": "DOWN", "Left": "LEFT", "Right": "RIGHT",
+    "Return": "ENTER", "Enter": "ENTER", "Esc": "QUIT", "Del": "DELETE",
+    "Ctrl+Z": "UNDO", "Ctrl+Y": "REDO", "Ctrl+Shift+Z": "REDO", "Ctrl+S": "SAVE", "Ctrl+O": "OPEN",
+    "Ctrl+C": "COPY", "Ctrl+V": "PASTE", "Ctrl+N": "NEW", "Ctrl+W": "CLOSE", "Space": "PLAY",
+    "F12": "HUD",
+}
+REPEAT_COMMANDS = {"UP", "DOWN", "LEFT", "RIGHT", "UNDO", "REDO"} # Auto-repeat of these is summed per frame
+APP_COMMANDS = {"QUIT", "HUD", "OPEN", "NEW"} # The rest only act on the score view
 
-def fetch_with_curl(url):
-    try:
-        result = subprocess.run(
-            ["curl", "-sL", "--max-time", "5", url],
-            check=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True
-        )
-        return result.stdout
-    except subprocess.CalledProcessError as e:
-        raise RuntimeError(f"curl failed: {e.stderr.strip()}")
+class HttpPool:
+    # Keep-alive connections to BASE_URL, so the update check and the asset fetch share sockets and TLS sessions
+    def __init__(self, base_url, size=4, timeout=5):
+        import queue
+        from urllib.parse import urlsplit
+        parts = urlsplit(base_url)
+        self.https = parts.scheme == "https"
+        self.host = parts.hostname
+        self.port = parts.port
+        self.prefix = parts.path.rstrip("/")
+        self.timeout = timeout
+        self._idle = queue.LifoQueue(maxsize=size)
+
+    def _connect(self):
+        import http.client
+        if self.https:
+            return http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout)
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def request(self, path, headers=None):
+        import queue
+        import http.client
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        for attempt in range(2):
+            try:
+                conn.request("GET", self.prefix + path, headers=headers or {})
+                response = conn.getresponse()
+                body = response.read()
+                break
+            except (http.client.HTTPException, OSError):
+                # A pooled socket may have been closed by the server; retry once on a fresh one
+                conn.close()
+                if attempt:
+                    raise
+                conn = self._connect()
+        if response.will_close:
+            conn.close()
+        else:
+            try:
+                self._idle.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+        return response.status, response.headers, body
+
+    def get(self, path):
+        status, _, body = self.request(path)
+        if status != 200:
+            raise RuntimeError(f"GET {path} returned HTTP {status}")
+        return body
+
+    def close(self):
+        import queue
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+_http_pool = None
+
+def http_pool():
+    global _http_pool
+    if _http_pool is None:
+        _http_pool = HttpPool(BASE_URL)
+    return _http_pool
+
+def _sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+def _sha256_file(path, chunk=1024 * 1024):
+    # Wheels run to hundreds of MB; hash them without holding one in memory
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            block = f.read(chunk)
+            if not block:
+                return digest.hexdigest()
+            digest.update(block)
+
+def _hash_requirements(reqs):
+    return _sha256("\n".join(sorted(reqs)).encode("utf-8"))
+
+def _write_atomic(path, data):
+    # Write next to the target and swap, so a crash never leaves a half-written file
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+def build_manifest(root):
+    # Release step: python 1626_조원.py --build-manifest, then upload manifest.json with the other files
+    root = Path(root)
+    version = (root / "v.txt").read_text(encoding="utf-8").strip()
+    reqs = (root / "req.txt").read_text(encoding="utf-8").strip().splitlines()
+    files = {SCRIPT_NAME: _sha256((root / SCRIPT_NAME).read_bytes())}
+    for asset in ASSETS:
+        files[f"assets/{asset}"] = _sha256((root / "assets" / asset).read_bytes())
+    manifest = {"version": version, "requirements": reqs,
+                "requirements_hash": _hash_requirements(reqs), "files": files}
+    _write_atomic(root / MANIFEST_NAME, (json.dumps(manifest, indent=2, ensure_ascii=False) + "\n").encode("utf-8"))
+    return manifest
+
+def fetch_manifest():
+    pool = http_pool()
+    status, _, body = pool.request(f"/{MANIFEST_NAME}")
+    if status == 200:
+        return json.loads(body.decode("utf-8"))
+    if status != 404:
+        raise RuntimeError(f"GET /{MANIFEST_NAME} returned HTTP {status}")
+    # Server without a manifest: fall back to v.txt/req.txt, still over the same connection
+    reqs = pool.get("/req.txt").decode("utf-8").strip().splitlines()
+    return {"version": pool.get("/v.txt").decode("utf-8").strip(), "requirements": reqs,
+            "requirements_hash": _hash_requirements(reqs), "files": {}}
+
+class StartupProfiler:
+    # Wall-clock time of each startup phase; phases nest, so the report reads like a call tree
+    def __init__(self):
+        self.enabled = False
+        self.origin = time.perf_counter()
+        self.phases = [] # [name, depth, start, duration]
+        self.imports = [] # (module, depth, duration) for modules imported for the first time
+        self._depth = 0
+        self._import_depth = 0
+        self._cprofile = None
+
+    def phase(self, name):
+        from contextlib import contextmanager
+        @contextmanager
+        def timed():
+            if not self.enabled:
+                yield
+                return
+            record = [name, self._depth, time.perf_counter(), None]
+            self.phases.append(record)
+            self._depth += 1
+            try:
+                yield
+            finally:
+                self._depth -= 1
+                record[3] = time.perf_counter() - record[2]
+        return timed()
+
+    def record(self, name, start, end=None):
+        # For spans that do not fit a with-block, e.g. show() until the first paint event
+        if self.enabled:
+            self.phases.append([name, self._depth, start, (end or time.perf_counter()) - start])
+
+    def trace_imports(self):
+        import builtins
+        original = builtins.__import__
+        def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+            if level or name in sys.modules:
+                return original(name, globals, locals, fromlist, level)
+            start = time.perf_counter()
+            self._import_depth += 1
+            try:
+                return original(name, globals, locals, fromlist, level)
+            finally:
+                self._import_depth -= 1
+                self.imports.append((name, self._import_depth, time.perf_counter() - start))
+        builtins.__import__ = timed_import
+
+    def start_cprofile(self):
+        import cProfile
+        self._cprofile = cProfile.Profile()
+        self._cprofile.enable()
+
+    def stop_cprofile(self, path):
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            self._cprofile.dump_stats(path)
+            self._cprofile = None
+
+    def to_json(self):
+        try:
+            version = (ASSETS_DIR / "v.txt").read_text(encoding="utf-8").strip()
+        except Exception:
+            version = None
+        return {
+            "version": version,
+            "python": sys.version.split()[0],
+            "platform": sys.platform,
+            "total_ms": round((time.perf_counter() - self.origin) * 1000, 3),
+            "phases": [{"name": name, "depth": depth, "start_ms": round((start - self.origin) * 1000, 3),
+                        "duration_ms": round((duration or 0) * 1000, 3)}
+                       for name, depth, start, duration in self.phases],
+            "imports": [{"module": module, "depth": depth, "duration_ms": round(duration * 1000, 3)}
+                        for module, depth, duration in sorted(self.imports, key=lambda i: -i[2])],
+        }
+
+    def table(self, top_imports=15):
+        data = self.to_json()
+        lines = [f"{'phase':<40} {'start ms':>10} {'ms':>10}", "-" * 62]
+        for p in data["phases"]:
+            lines.append(f"{'  ' * p['depth'] + p['name']:<40} {p['start_ms']:>10.1f} {p['duration_ms']:>10.1f}")
+        lines.append(f"{'total':<40} {'':>10} {data['total_ms']:>10.1f}")
+        top = [i for i in data["imports"] if i["depth"] == 0][:top_imports]
+        if top:
+            lines += ["", f"{'slowest top-level imports':<51} {'ms':>10}", "-" * 62]
+            lines += [f"{i['module']:<51} {i['duration_ms']:>10.1f}" for i in top]
+        return "\n".join(lines)
+
+PROFILER = StartupProfiler()
+
+def _flag_value(name, default=None):
+    # --name=value, or just --name for the default
+    for arg in sys.argv:
+        if arg == name:
+            return default
+        if arg.startswith(name + "="):
+            return arg.split("=", 1)[1]
+    return None
+
+class TraceRecorder:
+    # Timed spans in Chrome's trace event format (chrome://tracing, ui.perfetto.dev), written on exit.
+    # ZUOYUEQU_TRACE=out.json turns it on; off, traced() leaves functions unwrapped
+    MAX_EVENTS = 500000 # Oldest dropped first, so a long session stays bounded
+
+    def __init__(self, path=None):
+        import threading
+        self.path = "zuoyuequ_trace.json" if path == "1" else path
+        self.enabled = bool(path)
+        self.origin = time.perf_counter()
+        self.events = deque(maxlen=self.MAX_EVENTS) # (name, category, start, duration, thread id)
+        self._thread = threading.get_ident
+
+    def complete(self, name, start, end=None, category="main"):
+        if self.enabled:
+            self.events.append((name, category, start, (end or time.perf_counter()) - start, self._thread()))
+
+    def traced(self, name, category="main"):
+        def decorate(func):
+            if not self.enabled:
+                return func
+            import functools
+            @functools.wraps(func)
+            def timed(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.complete(name, start, category=category)
+            return timed
+        return decorate
+
+    def write(self):
+        if not self.enabled:
+            return
+        pid = os.getpid()
+        events = [{"name": name, "cat": category, "ph": "X", "pid": pid, "tid": tid,
+                   "ts": round((start - self.origin) * 1e6, 1), "dur": round(duration * 1e6, 1)}
+                  for name, category, start, duration, tid in list(self.events)]
+        _write_atomic(Path(self.path), json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}).encode("utf-8"))
+        print(f"[profile] Wrote {len(events)} trace events to {self.path}", file=sys.stderr)
+
+TRACER = TraceRecorder(os.environ.get("ZUOYUEQU_TRACE"))
+
+class FrameStats:
+    # Rolling paint timings of the score view, and how long key presses take to reach the screen
+    IDLE = 0.2 # A longer gap between paints is idle time, not a slow frame
+    STALE_INPUT = 1.0 # A key press that has not led to a paint by then did not cause one
+
+    def __init__(self, window=120):
+        self.frames = deque(maxlen=window)
+        self.paints = deque(maxlen=window)
+        self.latencies = deque(maxlen=window)
+        self.last_paint = None
+        self.input_start = None # Oldest key press not yet on screen
+
+    def input(self, at):
+        if self.input_start is None:
+            self.input_start = at
+
+    def painted(self, start, end):
+        self.paints.append(end - start)
+        if self.last_paint is not None and start - self.last_paint < self.IDLE:
+            self.frames.append(end - self.last_paint)
+        self.last_paint = end
+        TRACER.complete("paint", start, end)
+        if self.input_start is not None:
+            if end - self.input_start < self.STALE_INPUT:
+                self.latencies.append(end - self.input_start)
+                TRACER.complete("input to paint", self.input_start, end, "input")
+            self.input_start = None
+
+def finish_startup_profile():
+    cprofile_path = _flag_value("--profile-cprofile", "startup.prof")
+    if cprofile_path:
+        PROFILER.stop_cprofile(cprofile_path)
+    json_path = _flag_value("--profile-startup", "startup_profile.json")
+    print(PROFILER.table(), file=sys.stderr)
+    _write_atomic(Path(json_path), json.dumps(PROFILER.to_json(), indent=1).encode("utf-8"))
+    print(f"[profile] Wrote {json_path}" + (f" and {cprofile_path}" if cprofile_path else ""), file=sys.stderr)
 
 def exception_importing(context="importing"):
     import shutil
@@ -28,8 +347,113 @@ def exception_importing(context="importing"):
     print("[hint] Please run the program again to reinstall dependencies.", file=sys.stderr)
     sys.exit(1)
 
-def bootstrapper(): # auto-install PySide6 into a controolable folder, avoiding 'it doesn’t work on my PC'
+def _store_key(req):
+    # The same requirement line resolves differently per interpreter and platform
+    import platform
+    tag = f"{sys.version_info[0]}.{sys.version_info[1]}|{sys.platform}|{platform.machine()}|{req.strip()}"
+    return _sha256(tag.encode("utf-8"))[:16]
+
+def _run_pip(args):
+    # Prevent conflicts with packages from the main Python environment.
+    install_env = os.environ.copy()
+    install_env["PYTHONNOUSERSITE"] = "1"
+    try:
+        subprocess.run([sys.executable, "-m", "pip"] + args, check=True, env=install_env)
+    except subprocess.CalledProcessError as e:
+        print(f"\n[bootstrapper] pip failed. ({e.returncode})", file=sys.stderr)
+        sys.exit(e.returncode)
+
+def _cached_wheels(key, index):
+    # Wheels recorded for this requirement, if every one is still on disk with the recorded hash
+    files = index.get("requirements", {}).get(key)
+    if not files:
+        return None
+    for name in files:
+        path = WHEEL_CACHE / name
+        if not path.exists() or _sha256_file(path) != index["wheels"].get(name):
+            return None
+    return files
+
+def _download_wheels(req, key, index):
+    import shutil
+    incoming = WHEEL_CACHE / f".incoming-{os.getpid()}"
+    shutil.rmtree(incoming, ignore_errors=True)
+    # --find-links lets pip copy wheels we already hold instead of downloading them again
+    _run_pip(["download", "--dest", str(incoming), "--find-links", str(WHEEL_CACHE), req])
+    files = []
+    for path in sorted(incoming.iterdir()):
+        digest = _sha256_file(path)
+        if index["wheels"].get(path.name) != digest or not (WHEEL_CACHE / path.name).exists():
+            os.replace(path, WHEEL_CACHE / path.name)
+            index["wheels"][path.name] = digest
+        files.append(path.name)
+    shutil.rmtree(incoming, ignore_errors=True)
+    index["requirements"][key] = files
+
+def _install_one(req, key, index):
+    import shutil
+    if _cached_wheels(key, index) is None:
+        print(f"[bootstrapper] Downloading {req}...")
+        _download_wheels(req, key, index)
+        _write_atomic(WHEEL_CACHE / "index.json", json.dumps(index, indent=1).encode("utf-8"))
+    # Install into a staging tree and rename it into the store only once pip succeeded.
+    # Each tree carries its own copy of the requirement's dependencies; where two trees
+    # pin different versions of a shared one, the earlier requirement's tree wins on sys.path.
+    staging = STORE_DIR / f"{key}.staging-{os.getpid()}"
+    shutil.rmtree(staging, ignore_errors=True)
+    print(f"[bootstrapper] Installing {req}...")
+    _run_pip(["install", "--no-index", "--find-links", str(WHEEL_CACHE), "--target", str(staging), req])
+    os.replace(staging, STORE_DIR / key)
+
+def read_active_keys():
+    try:
+        with open(ACTIVE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception:
+        return []
+
+def install_requirements(reqs):
     import shutil
+    STORE_DIR.mkdir(parents=True, exist_ok=True)
+    WHEEL_CACHE.mkdir(parents=True, exist_ok=True)
+    try:
+        with open(WHEEL_CACHE / "index.json", 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except Exception:
+        index = {"wheels": {}, "requirements": {}}
+    keys = [_store_key(req) for req in reqs]
+    for req, key in zip(reqs, keys):
+        if (STORE_DIR / key).exists():
+            continue # Unchanged requirement, keep its tree
+        _install_one(req, key, index)
+    # The swap: until active.json is replaced, the previous set of packages stays in use
+    _write_atomic(ACTIVE_FILE, json.dumps(keys).encode("utf-8"))
+    # Drop trees no longer referenced, interrupted stagings and the old flat --target layout
+    for path in STORE_DIR.iterdir():
+        if path.name not in keys:
+            shutil.rmtree(path, ignore_errors=True)
+    for path in PKG_DIR.iterdir():
+        if path not in (STORE_DIR, ASSETS_DIR, ACTIVE_FILE):
+            shutil.rmtree(path, ignore_errors=True) if path.is_dir() else path.unlink()
+    _prune_wheels(index, keys)
+
+def _prune_wheels(index, keys):
+    # Forget requirements that are gone, and delete the wheels none of the remaining ones use
+    import shutil
+    index["requirements"] = {key: files for key, files in index["requirements"].items() if key in keys}
+    used = {name for files in index["requirements"].values() for name in files}
+    index["wheels"] = {name: digest for name, digest in index["wheels"].items() if name in used}
+    _write_atomic(WHEEL_CACHE / "index.json", json.dumps(index, indent=1).encode("utf-8"))
+    for path in WHEEL_CACHE.iterdir():
+        if path.name != "index.json" and path.name not in used:
+            shutil.rmtree(path, ignore_errors=True) if path.is_dir() else path.unlink()
+
+def activate_packages():
+    # Earlier requirements take priority, like the order of req.txt
+    for key in reversed(read_active_keys()):
+        sys.path.insert(0, str(STORE_DIR / key))
+
+def bootstrapper(): # auto-install PySide6 into a controolable folder, avoiding 'it doesn’t work on my PC'
     os.remove("1626_temp.py") if Path("1626_temp.py").exists() else None
     # mandatory check
     try:
@@ -39,17 +463,20 @@ def bootstrapper(): # auto-install PySide6 into a controolable folder, avoiding
         sys.exit(1)
     print("[bootstrapper] pip is available.")
 
-    # Fetch v.txt and req.txt
-    remote_v = ""
-    remote_req = []
+    # Fetch the manifest (version, requirements hash, per-file hashes) in one request
+    remote = None
     try:
-        remote_v = fetch_with_curl("https://zuoyuequ.trillion-won.com/v.txt").strip()
-        remote_req = fetch_with_curl("https://zuoyuequ.trillion-won.com/req.txt").strip().splitlines()
+        remote = fetch_manifest()
     except Exception as e:
+        if cache_is_valid():
+            print(f"[bootstrapper] Failed to fetch, starting from cache: {e}", file=sys.stderr)
+            return None
         print(f"[bootstrapper] Failed to fetch: {e}", file=sys.stderr)
         print("[hint] The program did not work as expected.", file=sys.stderr)
         print("[hint] Check the internet connection and try again.", file=sys.stderr)
         sys.exit(1)
+    remote_v = remote["version"]
+    remote_req = remote["requirements"]
 
     # If ASSETS_DIR does not exist, skip reading v.txt and req.txt
     local_v = ""
@@ -73,14 +500,22 @@ def bootstrapper(): # auto-install PySide6 into a controolable folder, avoiding
             print(f"[bootstrapper] Failed to read local files: {e}", file=sys.stderr)
             print(f"[tip] Check instance already running or file permissions.", file=sys.stderr)
             sys.exit(1)
-    
-    # v diff > replace
-    if remote_v != local_v:
-        print("[bootstrapper] v.txt mismatch!")
-        # Fetch v.py
+
+    # script hash diff > replace (servers without a manifest only give us v.txt to compare)
+    script_path = Path(sys.argv[0])
+    remote_hash = remote["files"].get(SCRIPT_NAME)
+    if remote_hash:
+        outdated = _sha256(script_path.read_bytes()) != remote_hash
+    else:
+        outdated = remote_v != local_v
+    if outdated:
+        print("[bootstrapper] Script hash mismatch!")
+        from urllib.parse import quote
         file = None
         try:
-            file = fetch_with_curl("https://zuoyuequ.trillion-won.com/1626_%EC%A1%B0%EC%9B%90.py")
+            file = http_pool().get("/" + quote(SCRIPT_NAME))
+            if remote_hash and _sha256(file) != remote_hash:
+                raise RuntimeError("downloaded script does not match the manifest")
         except Exception as e:
             print(f"[bootstrapper] Failed to fetch: {e}", file=sys.stderr)
             print("[hint] The program did not work as expected.", file=sys.stderr)
@@ -91,8 +526,8 @@ def bootstrapper(): # auto-install PySide6 into a controolable folder, avoiding
                 ASSETS_DIR.mkdir(parents=True, exist_ok=True)
             with open(ASSETS_DIR / "v.txt", 'w', encoding='utf-8') as f:
                 f.write(remote_v)
-            os.rename(Path(sys.argv[0]), "1626_temp.py")
-            with open(Path(sys.argv[0]), 'w', encoding='utf-8') as f:
+            os.rename(script_path, "1626_temp.py")
+            with open(script_path, 'wb') as f:
                 f.write(file)
         except Exception as e:
             print(f"[bootstrapper] Failed to write files: {e}", file=sys.stderr)
@@ -100,54 +535,1622 @@ def bootstrapper(): # auto-install PySide6 into a controolable folder, avoiding
             sys.exit(1)
         print("[!] Please re-run the program.")
         sys.exit(0)
-    
-    # req diff > reinstall
-    if sorted(remote_req) != sorted(local_req):
+    if remote_v != local_v and ASSETS_DIR.exists():
+        with open(ASSETS_DIR / "v.txt", 'w', encoding='utf-8') as f:
+            f.write(remote_v)
+
+    # req diff > install only what changed
+    if not ACTIVE_FILE.exists() or remote["requirements_hash"] != _hash_requirements(local_req):
         print("[bootstrapper] req.txt mismatch!")
-        if PKG_DIR.exists():
-            try:
-                shutil.rmtree(PKG_DIR, ignore_errors=True)
-            except Exception as e:
-                print(f"[bootstrapper] Failed to clear old packages: {e}", file=sys.stderr)
-                print(f"[tip] Check instance already running or file permissions.", file=sys.stderr)
-                sys.exit(1)
         ASSETS_DIR.mkdir(parents=True, exist_ok=True)
+        install_requirements(remote_req)
         with open(ASSETS_DIR / "v.txt", 'w', encoding='utf-8') as f:
             f.write(remote_v)
         with open(ASSETS_DIR / "req.txt", 'w', encoding='utf-8') as f:
             f.write('\n'.join(remote_req))
-        print(f"[bootstrapper] Installing to \"{PKG_DIR}\"...")
-        cmd = [sys.executable, "-m", "pip", "install", "--upgrade", "--target", str(PKG_DIR)] + remote_req
-        try:
-            # Prevent conflicts with packages from the main Python environment.
-            install_env = os.environ.copy()
-            install_env["PYTHONNOUSERSITE"] = "1"
-            subprocess.run(cmd, check=True, env=install_env)
-        except subprocess.CalledProcessError as e:
-            print(f"\n[bootstrapper] pip failed. ({e.returncode})", file=sys.stderr)
-            sys.exit(e.returncode)
         print("[bootstrapper] Dependencies ready.")
+    # Everything is current now; forget whatever a background check staged earlier
+    if STAGED_SCRIPT.exists():
+        os.remove(STAGED_SCRIPT)
+    write_update_state({"checked": time.time(), "notice": None})
+    return remote
+
+def read_update_state():
+    try:
+        with open(UPDATE_STATE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+def write_update_state(state):
+    _write_atomic(UPDATE_STATE, json.dumps(state).encode("utf-8"))
+
+def cache_is_valid():
+    # Enough is on disk to start without the network: packages, requirement list and intact assets
+    if not read_active_keys() or not (ASSETS_DIR / "req.txt").exists():
+        return False
+    manifest = read_asset_manifest()
+    return all(asset_is_valid(asset, manifest.get(asset)) for asset in ASSETS)
+
+def update_pending():
+    # A background check found newer packages or assets; only the blocking bootstrapper installs them.
+    # The cache still works meanwhile, so without a network the old ones start as before.
+    state = read_update_state()
+    return bool(state.get("requirements_outdated") or state.get("assets_outdated"))
+
+def apply_staged_update():
+    # A script downloaded by a background check replaces this one and is started right away
+    if not STAGED_SCRIPT.exists():
+        return
+    script_path = Path(sys.argv[0])
+    print("[bootstrapper] Applying downloaded update...")
+    try:
+        os.remove("1626_temp.py") if Path("1626_temp.py").exists() else None
+        os.rename(script_path, "1626_temp.py")
+        os.replace(STAGED_SCRIPT, script_path)
+        write_update_state(dict(read_update_state(), notice=None))
+    except Exception as e:
+        print(f"[bootstrapper] Failed to apply update: {e}", file=sys.stderr)
+        print(f"[tip] Check instance already running or file permissions.", file=sys.stderr)
+        return
+    os.execv(sys.executable, [sys.executable] + sys.argv)
+
+def check_for_update():
+    state = read_update_state()
+    if time.time() - state.get("checked", 0) < UPDATE_TTL:
+        return state.get("notice")
+    from urllib.parse import quote
+    remote = fetch_manifest()
+    notice = None
+    script_hash = remote["files"].get(SCRIPT_NAME)
+    if script_hash and _sha256(Path(sys.argv[0]).read_bytes()) != script_hash:
+        content = http_pool().get("/" + quote(SCRIPT_NAME))
+        if _sha256(content) != script_hash:
+            raise RuntimeError("downloaded script does not match the manifest")
+        _write_atomic(STAGED_SCRIPT, content)
+        notice = f"Version {remote['version']} is ready. Restart to update."
+    local_req = (ASSETS_DIR / "req.txt").read_text(encoding="utf-8").strip().splitlines()
+    requirements_outdated = remote["requirements_hash"] != _hash_requirements(local_req)
+    manifest = read_asset_manifest()
+    assets_outdated = any(remote["files"].get(f"assets/{asset}") not in (None, manifest.get(asset, {}).get("sha256"))
+                          for asset in ASSETS)
+    if (requirements_outdated or assets_outdated) and notice is None:
+        notice = "An update is available. Restart with an internet connection to install it."
+    write_update_state({"checked": time.time(), "notice": notice, "requirements_outdated": requirements_outdated,
+                        "assets_outdated": assets_outdated})
+    return notice
+
+class UpdateCheck:
+    # Runs check_for_update() off the UI thread; main() polls `done` and shows `notice`
+    def __init__(self):
+        import threading
+        self.done = threading.Event()
+        self.notice = None
+        self._thread = threading.Thread(target=self._run, name="update-check", daemon=True)
 
-def asset_fetch():
-    print("[bootstrapper] Fetching assets...")
-    assets = ["new_score.svg", "quarter_note_up.svg", "quarter_note_down.svg", "treble.svg"]
-    for asset in assets:
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
         try:
-            content = fetch_with_curl(f"https://zuoyuequ.trillion-won.com/assets/{asset}")
-            print(content)
-            with open(ASSETS_DIR / asset, 'w') as f:
-                f.write(content)
+            self.notice = check_for_update()
         except Exception as e:
-            print(f"[bootstrapper] Failed to fetch asset {asset}: {e}", file=sys.stderr)
-            print("[hint] The program did not work as expected.", file=sys.stderr)
-            print("[hint] Check the internet connection and try again.", file=sys.stderr)
-            sys.exit(1)
+            print(f"[bootstrapper] Background update check failed: {e}", file=sys.stderr)
+        finally:
+            self.done.set()
+
+def read_asset_manifest():
+    try:
+        with open(ASSET_MANIFEST, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+def write_asset_manifest(manifest):
+    _write_atomic(ASSET_MANIFEST, json.dumps(manifest, indent=1, sort_keys=True).encode("utf-8"))
+
+def asset_is_valid(asset, entry):
+    path = ASSETS_DIR / asset
+    if not entry or not path.exists():
+        return False
+    with open(path, 'rb') as f:
+        return _sha256(f.read()) == entry.get("sha256")
+
+def _fetch_asset(asset, entry, expected=None):
+    # Conditional GET: a 304 costs one round trip and no body
+    headers = {}
+    if entry:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+    status, response_headers, content = http_pool().request(f"/assets/{asset}", headers)
+    if status == 304 and entry:
+        return None, dict(entry, checked=time.time())
+    if status != 200:
+        raise RuntimeError(f"HTTP {status}")
+    if expected and _sha256(content) != expected:
+        raise RuntimeError("content does not match the manifest")
+    return content, {"sha256": _sha256(content), "etag": response_headers.get("ETag"),
+                     "last_modified": response_headers.get("Last-Modified"), "checked": time.time()}
+
+def asset_fetch(remote=None):
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+    manifest = read_asset_manifest()
+    now = time.time()
+    # With a server manifest the hashes decide; without one, fall back to TTL + revalidation
+    expected = {asset: (remote or {}).get("files", {}).get(f"assets/{asset}") for asset in ASSETS}
+    valid = {asset: asset_is_valid(asset, manifest.get(asset)) for asset in ASSETS}
+    stale = []
+    for asset in ASSETS:
+        if expected[asset]:
+            if not valid[asset] or manifest[asset]["sha256"] != expected[asset]:
+                stale.append(asset)
+        elif not valid[asset] or now - manifest[asset].get("checked", 0) > ASSET_TTL:
+            stale.append(asset)
+    if not stale:
+        print("[bootstrapper] Assets up to date.")
+        return
+    print(f"[bootstrapper] Fetching assets... ({len(stale)}/{len(ASSETS)})")
+    failed = False
+    with ThreadPoolExecutor(max_workers=len(stale)) as pool:
+        # Only send validators for files we can prove are intact and current, otherwise ask for the full body
+        futures = {}
+        for asset in stale:
+            entry = manifest.get(asset) if valid[asset] and not expected[asset] else None
+            futures[pool.submit(_fetch_asset, asset, entry, expected[asset])] = asset
+        for future in as_completed(futures):
+            asset = futures[future]
+            try:
+                content, entry = future.result()
+                if content is not None:
+                    _write_atomic(ASSETS_DIR / asset, content)
+                manifest[asset] = entry
+            except Exception as e:
+                if valid[asset]:
+                    print(f"[bootstrapper] Could not revalidate asset {asset}, using cached copy: {e}", file=sys.stderr)
+                    continue
+                print(f"[bootstrapper] Failed to fetch asset {asset}: {e}", file=sys.stderr)
+                failed = True
+    write_asset_manifest(manifest)
+    if failed:
+        print("[hint] The program did not work as expected.", file=sys.stderr)
+        print("[hint] Check the internet connection and try again.", file=sys.stderr)
+        sys.exit(1)
     print("[bootstrapper] Assets ready.")
 
 
+# -- Score model --
+TICKS_PER_QUARTER = 480
+MEASURE_TICKS = 4 * TICKS_PER_QUARTER # 4/4 only for now
+TOP_LINE_STEP = 38 # Diatonic step of the top treble line (F5); C4 = 28, one step per line/space
+STEP_H = 5 # Half a staff space in px
+
+# Page geometry, px at 96 dpi (A4)
+PAPER_W, PAPER_H = 794, 1123
+MARGIN_X, MARGIN_Y = 50, 100
+LINE_SPACING = 10
+SYSTEM_GAP = 80
+SYSTEMS_PER_PAGE = 8
+SYSTEM_STEP = 4 * LINE_SPACING + SYSTEM_GAP # Top line to top line
+PAGE_GAP = 40
+
+# Glyph placement, shared by the editor's scene items and export
+GLYPH_FILES = {"note_up": "quarter_note_up.svg", "note_down": "quarter_note_down.svg", "treble": "treble.svg"}
+NOTE_SCALE = 0.4 # Note SVGs are 100x120, a stave space is ~10px
+NOTE_HEADS = {"up": (16, 36), "down": (20, 12)} # Notehead centre inside each scaled note glyph
+CLEF_SCALE = 0.068
+CLEF_X, CLEF_DY = 51, -5.3 # Treble clef box, relative to the system's top line
+
+_LETTER_SEMITONES = (0, 2, 4, 5, 7, 9, 11)
+
+# Staff step at each px of a system's band (half a gap above the top line to half a gap below the
+# bottom one), so mapping a y to a line/space is one lookup
+SLOT_TICKS = TICKS_PER_QUARTER // 2 # Rhythmic grid for clicks and cursor moves
+STEP_BAND_TOP = -SYSTEM_GAP // 2
+STEP_BY_Y = array('b', [TOP_LINE_STEP - round(dy / STEP_H)
+                        for dy in range(STEP_BAND_TOP, 4 * LINE_SPACING + SYSTEM_GAP // 2 + 1)])
+STEP_MIN, STEP_MAX = min(STEP_BY_Y), max(STEP_BY_Y)
+
+def step_to_midi(step, alter=0):
+    octave, letter = divmod(step, 7)
+    return 12 * (octave + 1) + _LETTER_SEMITONES[letter] + alter
+
+Note = namedtuple("Note", "id tick duration step alter voice stem")
+
+def note_stem(step, stem):
+    # Explicit stem, otherwise down from the middle line up
+    return "down" if stem < 0 or (stem == 0 and step >= TOP_LINE_STEP - 4) else "up"
+
+JOURNAL_BYTES = 4 * 1024 * 1024 # Undo history cap; the oldest edits are forgotten first
+
+class Score:
+    # Notes live in parallel typed arrays sorted by (tick, voice, id), 16 bytes a note.
+    # A note's measure is tick // MEASURE_TICKS, so measure ranges come from bisecting `ticks`.
+    def __init__(self):
+        self.ids = array('I')
+        self.ticks = array('I')
+        self.durations = array('I')
+        self.steps = array('b')
+        self.alters = array('b')
+        self.voices = array('B')
+        self.stems = array('b') # 1 up, -1 down, 0 automatic
+        self.next_id = 1
+        self.version = 0 # Bumped on every change, for caches built from the model
+        self.meta = {} # Title and other file metadata
+        self.measure_index = None # First note of each measure, from a loaded file until the first change
+        self._mapping = None # (mmap, memoryview) while the columns are views into a score file
+
+    def columns(self):
+        return (self.ids, self.ticks, self.durations, self.steps, self.alters, self.voices, self.stems)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def note(self, i):
+        return Note(self.ids[i], self.ticks[i], self.durations[i], self.steps[i],
+                    self.alters[i], self.voices[i], self.stems[i])
+
+    def __iter__(self):
+        for i in range(len(self.ids)):
+            yield self.note(i)
+
+    def span(self, start_tick, end_tick):
+        # Index range [lo, hi) of notes starting in [start_tick, end_tick)
+        return bisect_left(self.ticks, start_tick), bisect_left(self.ticks, end_tick)
+
+    def measure_span(self, measure):
+        index = self.measure_index
+        if index is not None and measure + 1 < len(index):
+            return index[measure], index[measure + 1]
+        return self.span(measure * MEASURE_TICKS, (measure + 1) * MEASURE_TICKS)
+
+    def measure_count(self):
+        if not self.ids:
+            return 0
+        return (max(self.ticks[-1] + self.durations[-1] - 1, 0)) // MEASURE_TICKS + 1
+
+    def find(self, tick, note_id):
+        for i in range(bisect_left(self.ticks, tick), bisect_right(self.ticks, tick)):
+            if self.ids[i] == note_id:
+                return i
+        raise KeyError(note_id)
+
+    def detach(self):
+        # Copy columns mapped from a file into owned arrays, before the first change or a rewrite of the file
+        if self._mapping is None:
+            return
+        columns = []
+        for column in self.columns():
+            columns.append(array(column.format, column.tobytes()))
+            column.release()
+        self.ids, self.ticks, self.durations, self.steps, self.alters, self.voices, self.stems = columns
+        if self.measure_index is not None:
+            self.measure_index.release()
+            self.measure_index = None
+        mapped, view = self._mapping
+        view.release()
+        mapped.close()
+        self._mapping = None
+
+    def insert(self, tick, step, duration=TICKS_PER_QUARTER, alter=0, voice=0, stem=0, note_id=None):
+        self.detach()
+        self.measure_index = None
+        if note_id is None:
+            note_id = self.next_id
+        self.next_id = max(self.next_id, note_id + 1)
+        # Notes sharing a tick (chords, other voices) are few, so order them with a short scan
+        i, hi = bisect_left(self.ticks, tick), bisect_right(self.ticks, tick)
+        while i < hi and (self.voices[i], self.ids[i]) < (voice, note_id):
+            i += 1
+        for column, value in zip(self.columns(), (note_id, tick, duration, step, alter, voice, stem)):
+            column.insert(i, value)
+        self.version += 1
+        return note_id
+
+    def insert_many(self, notes):
+        # notes: (tick, step, duration, alter, voice, stem, note_id or None), in any order. The ones sorting
+        # after the last note, the usual case for imports and generated runs, are appended column by column.
+        ids, rows = [], []
+        for tick, step, duration, alter, voice, stem, note_id in notes:
+            if note_id is None:
+                note_id = self.next_id
+            self.next_id = max(self.next_id, note_id + 1)
+            ids.append(note_id)
+            rows.append((tick, voice, note_id, step, duration, alter, stem))
+        rows.sort()
+        split = bisect_right(rows, (self.ticks[-1], self.voices[-1], self.ids[-1])) if len(self) else 0
+        for tick, voice, note_id, step, duration, alter, stem in rows[:split]:
+            self.insert(tick, step, duration, alter, voice, stem, note_id)
+        if split < len(rows):
+            self.detach()
+            self.measure_index = None
+            tail = [(note_id, tick, duration, step, alter, voice, stem)
+                    for tick, voice, note_id, step, duration, alter, stem in rows[split:]]
+            for column, values in zip(self.columns(), zip(*tail)):
+                column.extend(values)
+            self.version += len(tail)
+        return ids
+
+    def remove(self, tick, note_id):
+        self.detach()
+        self.measure_index = None
+        i = self.find(tick, note_id)
+        note = self.note(i)
+        for column in self.columns():
+            del column[i]
+        self.version += 1
+        return note
+
+    def transpose(self, steps, lo=0, hi=None):
+        self.detach()
+        hi = len(self.ids) if hi is None else hi
+        self.steps[lo:hi] = array('b', [step + steps for step in self.steps[lo:hi]])
+        self.version += 1
+
+    def search(self, step, alter=0):
+        # Indices of every note at this pitch
+        return [i for i, s in enumerate(self.steps) if s == step and self.alters[i] == alter]
+
+    def nbytes(self):
+        return sum(column.itemsize * len(column) for column in self.columns())
+
+    def copy(self):
+        # Owned copy, e.g. for a worker thread to read while the editor keeps editing
+        other = Score()
+        columns = [array(column.typecode if isinstance(column, array) else column.format, column.tobytes())
+                   for column in self.columns()]
+        other.ids, other.ticks, other.durations, other.steps, other.alters, other.voices, other.stems = columns
+        other.next_id = self.next_id
+        other.meta = dict(self.meta)
+        return other
+
+
+class EditJournal:
+    # Undo history as deltas, not snapshots: an entry packs (op, *Note) per changed note into one int array,
+    # 32 bytes a note. Edits of the same kind in quick succession (typing a run) merge into one entry.
+    INSERT = 1
+    REMOVE = -1
+    FIELDS = 1 + len(Note._fields)
+    MERGE_WINDOW = 2.0 # Seconds between edits that still merge
+
+    def __init__(self, max_bytes=JOURNAL_BYTES):
+        self.max_bytes = max_bytes
+        self.undo_entries = deque()
+        self.redo_entries = []
+        self.nbytes = 0
+        self._merge_op = None
+        self._last_time = 0.0
+
+    def record(self, op, note, merge=True):
+        now = time.monotonic()
+        if merge and self._merge_op == op and now - self._last_time < self.MERGE_WINDOW:
+            entry = self.undo_entries[-1]
+        else:
+            entry = array('i')
+            self.undo_entries.append(entry)
+        entry.append(op)
+        entry.extend(note)
+        self.nbytes += self.FIELDS * entry.itemsize
+        self._merge_op = op if merge else None
+        self._last_time = now
+        # A new edit forks history: what was undone cannot be redone any more
+        for entry in self.redo_entries:
+            self.nbytes -= len(entry) * entry.itemsize
+        self.redo_entries.clear()
+        while self.nbytes > self.max_bytes and len(self.undo_entries) > 1:
+            entry = self.undo_entries.popleft()
+            self.nbytes -= len(entry) * entry.itemsize
+
+    def seal(self):
+        # The next edit starts a new entry
+        self._merge_op = None
+
+    def record_batch(self, op, notes):
+        # One entry of its own for a bulk edit (paste, generated notes), however long it took
+        self.seal()
+        for note in notes:
+            self.record(op, note)
+        self.seal()
+
+    def undo(self):
+        # Deltas that revert the newest entry, in the order to apply them
+        if not self.undo_entries:
+            return []
+        entry = self.undo_entries.pop()
+        self.redo_entries.append(entry)
+        self._merge_op = None
+        return [(-op, note) for op, note in reversed(self._deltas(entry))]
+
+    def redo(self):
+        if not self.redo_entries:
+            return []
+        entry = self.redo_entries.pop()
+        self.undo_entries.append(entry)
+        self._merge_op = None
+        return self._deltas(entry)
+
+    def _deltas(self, entry):
+        return [(entry[i], Note._make(entry[i + 1:i + self.FIELDS])) for i in range(0, len(entry), self.FIELDS)]
+
+
+# -- Score files --
+# .zyq: header, title/metadata JSON, then each Score column as raw little-endian array bytes in columns()
+# order, then the first-note index of every measure. Columns are mapped, not read, so opening is O(1).
+SCORE_MAGIC = b"ZYQ\x00"
+SCORE_VERSION = 1
+SCORE_HEADER = struct.Struct("<4sHHIIIII") # magic, version, reserved, generation, next_id, notes, measures, meta bytes
+JOURNAL_MAGIC = b"ZYQJ"
+JOURNAL_HEADER = struct.Struct("<4sI") # magic, generation of the score file it applies to
+COLUMN_CODES = "IIIbbBb"
+
+def _le_bytes(column):
+    if sys.byteorder == "little":
+        return column.tobytes()
+    swapped = array(column.typecode if isinstance(column, array) else column.format, column.tobytes())
+    swapped.byteswap()
+    return swapped.tobytes()
+
+def _pad4(n):
+    return -n % 4
+
+def save_score(score, path, generation):
+    meta = json.dumps(score.meta, ensure_ascii=False).encode("utf-8")
+    measures = score.measure_count()
+    index = array('I', [bisect_left(score.ticks, m * MEASURE_TICKS) for m in range(measures)] + [len(score)])
+    parts = [SCORE_HEADER.pack(SCORE_MAGIC, SCORE_VERSION, 0, generation, score.next_id, len(score), measures, len(meta)),
+             meta, b"\x00" * _pad4(SCORE_HEADER.size + len(meta))]
+    size = SCORE_HEADER.size + len(meta) + _pad4(SCORE_HEADER.size + len(meta))
+    for column in score.columns():
+        data = _le_bytes(column)
+        parts += [data, b"\x00" * _pad4(size + len(data))]
+        size += len(data) + _pad4(size + len(data))
+    parts.append(_le_bytes(index))
+    _write_atomic(Path(path), b"".join(parts))
+
+def load_score(path, replay=True):
+    # Returns (score, generation); the autosave journal, if it belongs to this file, is replayed on top
+    path = Path(path)
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapped)
+    magic, version, _, generation, next_id, count, measures, meta_len = SCORE_HEADER.unpack_from(view)
+    if magic != SCORE_MAGIC:
+        raise ValueError(f"{path.name} is not a score file")
+    if version > SCORE_VERSION:
+        raise ValueError(f"{path.name} needs a newer version of this program")
+    score = Score()
+    offset = SCORE_HEADER.size
+    score.meta = json.loads(bytes(view[offset:offset + meta_len]).decode("utf-8"))
+    offset += meta_len + _pad4(offset + meta_len)
+    columns = []
+    for code in COLUMN_CODES + "I":
+        n = (measures + 1 if len(columns) == len(COLUMN_CODES) else count) * array(code).itemsize
+        columns.append(view[offset:offset + n].cast(code))
+        offset += n + _pad4(offset + n)
+    index = columns.pop()
+    score.ids, score.ticks, score.durations, score.steps, score.alters, score.voices, score.stems = columns
+    score.measure_index = index
+    score.next_id = next_id
+    score._mapping = (mapped, view)
+    if sys.byteorder != "little":
+        score.detach()
+        for column in score.columns():
+            column.byteswap()
+    if replay: # Readers other than the editor leave the journal, and whether it is stale, alone
+        _replay_journal(score, path, generation)
+    return score, generation
+
+def _journal_path(path):
+    return Path(path).with_name(Path(path).name + ".journal")
+
+def _replay_journal(score, path, generation):
+    journal = _journal_path(path)
+    try:
+        data = journal.read_bytes()
+    except FileNotFoundError:
+        return
+    if len(data) < JOURNAL_HEADER.size or JOURNAL_HEADER.unpack_from(data) != (JOURNAL_MAGIC, generation):
+        # Left over from before the last compaction, whose file already holds these edits
+        journal.unlink()
+        return
+    records = array('i')
+    body = data[JOURNAL_HEADER.size:]
+    torn = len(body) % (EditJournal.FIELDS * records.itemsize)
+    if torn:
+        # A crash mid-flush: cut the partial record off the file too, or the next flush appends after it
+        os.truncate(journal, len(data) - torn)
+        body = body[:len(body) - torn]
+    records.frombytes(body)
+    if sys.byteorder != "little":
+        records.byteswap()
+    for i in range(0, len(records), EditJournal.FIELDS):
+        op, note = records[i], Note._make(records[i + 1:i + EditJournal.FIELDS])
+        if op == EditJournal.INSERT:
+            score.insert(note.tick, note.step, note.duration, note.alter, note.voice, note.stem, note.id)
+        else:
+            score.remove(note.tick, note.id)
+
+class ScoreAutosave:
+    # Edits since the last full save, appended to <score>.journal; compaction rewrites the score file
+    COMPACT_BYTES = 256 * 1024
+
+    def __init__(self, path, generation):
+        self.path = Path(path)
+        self.journal = _journal_path(path)
+        self.generation = generation
+        self.pending = array('i')
+        self.journal_bytes = self.journal.stat().st_size if self.journal.exists() else 0
+
+    def record(self, op, note):
+        self.pending.append(op)
+        self.pending.extend(note)
+
+    def flush(self):
+        if not self.pending:
+            return
+        with open(self.journal, "ab") as f:
+            if self.journal_bytes == 0:
+                f.write(JOURNAL_HEADER.pack(JOURNAL_MAGIC, self.generation))
+            f.write(_le_bytes(self.pending))
+            f.flush()
+            os.fsync(f.fileno())
+            self.journal_bytes = f.tell()
+        self.pending = array('i')
+
+    def needs_compaction(self):
+        return self.journal_bytes > max(self.COMPACT_BYTES, self.path.stat().st_size // 4)
+
+    def compact(self, score):
+        # The new generation makes a journal that survives a crash right here stale rather than replayed twice
+        score.detach()
+        self.generation = (self.generation + 1) & 0xFFFFFFFF
+        save_score(score, self.path, self.generation)
+        self.journal.unlink(missing_ok=True)
+        self.journal_bytes = 0
+        self.pending = array('i')
+
+def new_score_path(title, directory=SCORES_DIR):
+    # "<title>.zyq", or "<title> 2.zyq" and so on when that is taken
+    name, n = f"{title}.zyq", 1
+    while (directory / name).exists():
+        n += 1
+        name = f"{title} {n}.zyq"
+    return directory / name
+
+
+# -- Import --
+IMPORT_BATCH = 2000 # Notes per batch handed from the import thread to the editor
+_SHARP_SPELLING = ((0, 0), (0, 1), (1, 0), (1, 1), (2, 0), (3, 0), (3, 1), (4, 0), (4, 1), (5, 0), (5, 1), (6, 0))
+_LETTER_STEPS = {letter: i for i, letter in enumerate("CDEFGAB")}
+
+def midi_to_step(key):
+    # (diatonic step, alter), spelling black keys as sharps; inverse of step_to_midi
+    octave, pitch_class = divmod(key, 12)
+    letter, alter = _SHARP_SPELLING[pitch_class]
+    return (octave - 1) * 7 + letter, alter
+
+def _xml_source(path):
+    # The score document as a stream; an .mxl is a zip whose container.xml names it
+    import zipfile
+    import xml.etree.ElementTree as ET
+    if Path(path).suffix.lower() != ".mxl":
+        return open(path, "rb")
+    archive = zipfile.ZipFile(path)
+    try:
+        container = ET.fromstring(archive.read("META-INF/container.xml"))
+        name = next(e.get("full-path") for e in container.iter() if e.tag.endswith("rootfile"))
+    except (KeyError, StopIteration):
+        name = next(n for n in archive.namelist() if n.endswith((".xml", ".musicxml")) and not n.startswith("META-INF/"))
+    return archive.open(name)
+
+def iter_musicxml(path):
+    # Batches of (tick, step, duration, alter, voice, stem) from the first part, in tick order.
+    # iterparse, and each measure is dropped once read, so memory stays flat however long the score is.
+    import xml.etree.ElementTree as ET
+    with _xml_source(path) as source:
+        part = None
+        divisions = 1
+        measure_start = position = longest = onset = 0
+        measure, batch = [], []
+        for event, elem in ET.iterparse(source, events=("start", "end")):
+            tag = elem.tag.rpartition("}")[2]
+            if event == "start":
+                if tag == "part" and part is None:
+                    part = elem
+                continue
+            if part is None:
+                continue
+            if tag == "divisions":
+                divisions = float(elem.text)
+            elif tag in ("backup", "forward"):
+                ticks = round(float(elem.findtext("duration") or 0) * TICKS_PER_QUARTER / divisions)
+                position = max(0, position - ticks if tag == "backup" else position + ticks)
+                longest = max(longest, position)
+            elif tag == "note":
+                if elem.find("grace") is not None:
+                    continue
+                ticks = round(float(elem.findtext("duration") or 0) * TICKS_PER_QUARTER / divisions)
+                if elem.find("chord") is None:
+                    onset = position
+                    position += ticks
+                    longest = max(longest, position)
+                pitch = elem.find("pitch")
+                if pitch is None or ticks <= 0:
+                    continue # Rest, unpitched or cue-sized
+                step = int(pitch.findtext("octave")) * 7 + _LETTER_STEPS[pitch.findtext("step").strip()]
+                voice = min(max(int(elem.findtext("voice") or 1) - 1, 0), 255)
+                stem = {"up": 1, "down": -1}.get(elem.findtext("stem"), 0)
+                measure.append((measure_start + onset, step, ticks, round(float(pitch.findtext("alter") or 0)), voice, stem))
+            elif tag == "measure":
+                measure_start += longest
+                position = longest = 0
+                measure.sort()
+                batch += measure
+                measure.clear()
+                part.clear()
+                if len(batch) >= IMPORT_BATCH:
+                    yield batch
+                    batch = []
+            elif tag == "part":
+                break # Only the first part fits on our single staff
+        if batch:
+            yield batch
+
+def _midi_varlen(data, i):
+    value = 0
+    while True:
+        byte = data[i]
+        i += 1
+        value = (value << 7) | (byte & 0x7F)
+        if byte < 0x80:
+            return value, i
+
+def _midi_track_notes(data, division):
+    # Notes of one MTrk chunk in onset order, yielded as soon as no held note can start earlier.
+    # Only held notes and the ones finished after them are buffered; channel 10 (percussion) has no pitch to show.
+    import heapq
+    finished = [] # Heap of notes waiting for an earlier held note to end
+    sounding = {} # (channel, key) -> onsets still held, oldest first
+    tick = i = status = 0
+    while i < len(data):
+        delta, i = _midi_varlen(data, i)
+        tick += delta
+        byte = data[i]
+        if byte == 0xFF:
+            kind = data[i + 1]
+            length, i = _midi_varlen(data, i + 2)
+            i += length
+            if kind == 0x2F: # End of track
+                break
+            continue
+        if byte in (0xF0, 0xF7):
+            length, i = _midi_varlen(data, i + 1)
+            i += length
+            continue
+        if byte & 0x80:
+            status = byte
+            i += 1
+        kind, channel = status & 0xF0, status & 0x0F
+        if kind in (0xC0, 0xD0):
+            i += 1
+            continue
+        key, velocity = data[i], data[i + 1]
+        i += 2
+        if channel == 9:
+            continue
+        if kind == 0x90 and velocity:
+            sounding.setdefault((channel, key), []).append(tick)
+        elif kind in (0x80, 0x90) and sounding.get((channel, key)):
+            held = sounding[(channel, key)]
+            start = held.pop(0)
+            if not held:
+                del sounding[(channel, key)]
+            step, alter = midi_to_step(key)
+            duration = max(1, (tick - start) * TICKS_PER_QUARTER // division)
+            heapq.heappush(finished, (start * TICKS_PER_QUARTER // division, step, duration, alter, channel, 0))
+            bound = min((held[0] for held in sounding.values()), default=tick) * TICKS_PER_QUARTER // division
+            while finished and finished[0][0] < bound:
+                yield heapq.heappop(finished)
+    while finished:
+        yield heapq.heappop(finished)
+
+def iter_midi(path):
+    # Standard MIDI file, format 0 or 1; each track is parsed lazily and the tracks are merged by onset,
+    # so the first batch goes out after its notes are read rather than after the whole file
+    import heapq
+    tracks = []
+    with open(path, "rb") as f:
+        chunk, length = struct.unpack(">4sI", f.read(8))
+        if chunk != b"MThd":
+            raise ValueError(f"{Path(path).name} is not a MIDI file")
+        _, count, division = struct.unpack(">HHh", f.read(6))
+        f.seek(length - 6, 1)
+        if division <= 0:
+            raise ValueError("SMPTE-timed MIDI files are not supported")
+        for _ in range(count):
+            header = f.read(8)
+            if len(header) < 8:
+                break
+            chunk, length = struct.unpack(">4sI", header)
+            data = f.read(length)
+            if chunk == b"MTrk":
+                tracks.append(_midi_track_notes(data, division))
+    batch = []
+    for note in heapq.merge(*tracks):
+        batch.append(note)
+        if len(batch) >= IMPORT_BATCH:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+class ImportJob:
+    # Parses a MusicXML/.mxl or MIDI file on a worker thread; the editor drains `batches` on the UI thread
+    def __init__(self, path):
+        import queue
+        import threading
+        self.path = Path(path)
+        self.batches = queue.Queue(maxsize=8) # Backpressure: the parser never runs far ahead of the editor
+        self.done = threading.Event()
+        self.error = None
+        self.cancelled = False
+        self.count = 0
+        self._thread = threading.Thread(target=self._run, name="score-import", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        import queue
+        try:
+            parse = iter_midi if self.path.suffix.lower() in (".mid", ".midi") else iter_musicxml
+            for batch in parse(self.path):
+                while not self.cancelled:
+                    try:
+                        self.batches.put(batch, timeout=0.1)
+                        break
+                    except queue.Full:
+                        pass
+                if self.cancelled:
+                    return
+                self.count += len(batch)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done.set()
+
+
+class ScoreLayout:
+    # Spacing, line breaks and page breaks for a Score, kept up to date incrementally.
+    # Measure widths are cached until a measure is invalidated; line breaking restarts at the
+    # first dirty system and stops as soon as a system starts where it did before.
+    QUARTER_W = 30 # Natural width of a quarter; other durations scale by (d / quarter) ** 0.6
+    PAD_LEFT, PAD_RIGHT = 12, 10
+    SYSTEM_LEFT = MARGIN_X + 40 # Room for the clef
+    SYSTEM_RIGHT = PAPER_W - MARGIN_X
+
+    def __init__(self, score):
+        self.score = score
+        self.widths = [] # Natural width per measure
+        self.spacing = [] # Per measure: [(tick offset, x offset), ...] ending with the measure end
+        self.system_starts = [] # First measure of each system
+        self._dirty = set()
+        self._system_x = {} # system -> stretched x of each of its measures, built on demand
+        self._slots = {} # system -> (slot xs, slot ticks), for hit testing
+        self._spaces = {} # tick distance -> natural width; scores use only a handful of distances
+
+    def invalidate(self, measure):
+        self._dirty.add(measure)
+
+    def _space(self, ticks):
+        space = self._spaces.get(ticks)
+        if space is None:
+            space = self._spaces[ticks] = self.QUARTER_W * (ticks / TICKS_PER_QUARTER) ** 0.6
+        return space
+
+    def _measure_spacing(self, measure):
+        # Ticks are sorted, so onsets come in order; equal ones (chords, voices) share a column
+        base = measure * MEASURE_TICKS
+        lo, hi = self.score.measure_span(measure)
+        x = self.PAD_LEFT
+        spacing = []
+        start = 0
+        for tick in self.score.ticks[lo:hi]:
+            if tick - base > start:
+                spacing.append((start, x))
+                x += self._space(tick - base - start)
+                start = tick - base
+        spacing.append((start, x))
+        x += self._space(MEASURE_TICKS - start)
+        spacing.append((MEASURE_TICKS, x))
+        return spacing, x + self.PAD_RIGHT
+
+    def update(self, measure_count):
+        # Returns the range [first, end) of systems whose layout changed, or None
+        old_count = len(self.widths)
+        if measure_count != old_count:
+            del self.widths[measure_count:]
+            del self.spacing[measure_count:]
+            self.widths.extend([0.0] * (measure_count - len(self.widths)))
+            self.spacing.extend([None] * (measure_count - len(self.spacing)))
+            self._dirty.update(range(min(old_count, measure_count), measure_count))
+            self._dirty.add(min(old_count, measure_count))
+        dirty = sorted(m for m in self._dirty if m <= measure_count)
+        self._dirty.clear()
+        if not dirty:
+            return None
+        for m in dirty:
+            if m < measure_count:
+                self.spacing[m], self.widths[m] = self._measure_spacing(m)
+        # From the system before: a narrower measure may now fit on the previous line
+        first = max(0, self.system_of(dirty[0]) - 1) if self.system_starts else 0
+        old_starts = self.system_starts
+        starts = old_starts[:first]
+        available = self.SYSTEM_RIGHT - self.SYSTEM_LEFT
+        m = old_starts[first] if first < len(old_starts) else 0
+        system = first
+        converged = False
+        while m < measure_count:
+            starts.append(m)
+            width = 0
+            end = m
+            while end < measure_count and (end == m or width + self.widths[end] <= available):
+                width += self.widths[end]
+                end += 1
+            system += 1
+            m = end
+            # Break points from here on are what they were: reuse them
+            if m > dirty[-1] and system < len(old_starts) and old_starts[system] == m and measure_count == old_count:
+                starts.extend(old_starts[system:])
+                converged = True
+                break
+        if not starts:
+            starts = [0]
+        self.system_starts = starts
+        end = system if converged else max(len(starts), len(old_starts))
+        for s in range(first, end):
+            self._system_x.pop(s, None)
+            self._slots.pop(s, None)
+        return first, end
+
+    def system_count(self):
+        return len(self.system_starts)
+
+    def page_count(self):
+        return max(1, -(-len(self.system_starts) // SYSTEMS_PER_PAGE))
+
+    def system_of(self, measure):
+        return max(0, bisect_right(self.system_starts, measure) - 1)
+
+    def system_measures(self, system):
+        start = self.system_starts[system]
+        end = self.system_starts[system + 1] if system + 1 < len(self.system_starts) else len(self.widths)
+        return start, end
+
+    def page_measures(self, page):
+        first = page * SYSTEMS_PER_PAGE
+        if first >= len(self.system_starts):
+            return len(self.widths), len(self.widths)
+        last = min(first + SYSTEMS_PER_PAGE, len(self.system_starts)) - 1
+        return self.system_starts[first], self.system_measures(last)[1]
+
+    def page_ticks(self, page):
+        start, end = self.page_measures(page)
+        return start * MEASURE_TICKS, end * MEASURE_TICKS
+
+    def _measure_xs(self, system):
+        # Justified: every system but the last is stretched to the full width
+        xs = self._system_x.get(system)
+        if xs is None:
+            start, end = self.system_measures(system)
+            natural = sum(self.widths[start:end])
+            stretch = 1.0
+            if system + 1 < len(self.system_starts) and natural > 0:
+                stretch = (self.SYSTEM_RIGHT - self.SYSTEM_LEFT) / natural
+            xs = [self.SYSTEM_LEFT]
+            for m in range(start, end):
+                xs.append(xs[-1] + self.widths[m] * stretch)
+            self._system_x[system] = xs
+        return xs
+
+    def measure_box(self, measure):
+        # (system, left x, right x) in page coordinates
+        system = self.system_of(measure)
+        xs = self._measure_xs(system)
+        i = measure - self.system_starts[system]
+        return system, xs[i], xs[i + 1]
+
+    def tick_x(self, tick):
+        # (system, x) of a time position; ticks between onsets are interpolated
+        measure, offset = divmod(tick, MEASURE_TICKS)
+        system, left, right = self.measure_box(measure)
+        spacing = self.spacing[measure]
+        scale = (right - left) / self.widths[measure]
+        i = bisect_right(spacing, (offset, float("inf"))) - 1
+        start, x = spacing[i]
+        if start != offset:
+            end, next_x = spacing[i + 1]
+            x += (next_x - x) * (offset - start) / (end - start)
+        return system, left + x * scale
+
+    def system_top(self, system):
+        return MARGIN_Y + (system % SYSTEMS_PER_PAGE) * SYSTEM_STEP
+
+    def head_pos(self, tick, step):
+        # (page, x, y) of a notehead centre in page coordinates
+        system, x = self.tick_x(tick)
+        return system // SYSTEMS_PER_PAGE, x, self.system_top(system) + (TOP_LINE_STEP - step) * STEP_H
+
+    def slot_table(self, system):
+        # x of every SLOT_TICKS position in the system, ascending, so a click bisects to its slot
+        table = self._slots.get(system)
+        if table is None:
+            start, end = self.system_measures(system)
+            ticks = array('I', range(start * MEASURE_TICKS, end * MEASURE_TICKS, SLOT_TICKS))
+            xs = array('d', [self.tick_x(tick)[1] for tick in ticks])
+            table = self._slots[system] = (xs, ticks)
+        return table
+
+    def hit_test(self, page, x, y):
+        # (system, staff step, slot tick) under page coordinates, or None off the systems
+        row = int((y - MARGIN_Y - STEP_BAND_TOP) // SYSTEM_STEP)
+        system = page * SYSTEMS_PER_PAGE + row
+        if not 0 <= row < SYSTEMS_PER_PAGE or system >= len(self.system_starts):
+            return None
+        dy = min(max(round(y - self.system_top(system)) - STEP_BAND_TOP, 0), len(STEP_BY_Y) - 1)
+        xs, ticks = self.slot_table(system)
+        i = bisect_left(xs, x)
+        if i == len(xs) or (i > 0 and x - xs[i - 1] < xs[i] - x):
+            i -= 1
+        return system, STEP_BY_Y[dy], ticks[i]
+
+    def system_geometry(self, system):
+        # (top line y, left x, right x, barline xs) of a system on its page
+        start, end = self.system_measures(system)
+        xs = self._measure_xs(system)
+        right = xs[-1] if system + 1 == len(self.system_starts) else self.SYSTEM_RIGHT
+        return self.system_top(system), MARGIN_X, right, xs[1:]
+
+
+# -- Export --
+EXPORT_FORMATS = ("pdf", "svg", "png")
+EXPORT_DPI = 300 # PNG resolution; PDF and SVG stay vector
+
+def paint_page(painter, score, layout, page, renderers):
+    # One page in page coordinates, straight from the model; the editor draws the same geometry
+    # through PageItem and GlyphItem, this draws it as vectors for export
+    try:
+        from PySide6.QtCore import Qt, QRectF, QLineF
+        from PySide6.QtGui import QPen
+    except:
+        exception_importing("paint_page")
+    painter.fillRect(QRectF(0, 0, PAPER_W, PAPER_H), Qt.white)
+    painter.setPen(QPen(Qt.black, 1))
+    treble = renderers["treble"]
+    clef_size = treble.defaultSize()
+    first = page * SYSTEMS_PER_PAGE
+    for system in range(first, min(first + SYSTEMS_PER_PAGE, layout.system_count())):
+        top, left, right, barlines = layout.system_geometry(system)
+        for i in range(5):
+            y = top + i * LINE_SPACING
+            painter.drawLine(QLineF(left, y, right, y))
+        for x in barlines:
+            painter.drawLine(QLineF(x, top, x, top + 4 * LINE_SPACING))
+        treble.render(painter, QRectF(CLEF_X, top + CLEF_DY, clef_size.width() * CLEF_SCALE, clef_size.height() * CLEF_SCALE))
+    lo, hi = score.span(*layout.page_ticks(page))
+    for i in range(lo, hi):
+        stem = note_stem(score.steps[i], score.stems[i])
+        _, x, y = layout.head_pos(score.ticks[i], score.steps[i])
+        head_x, head_y = NOTE_HEADS[stem]
+        glyph = renderers[f"note_{stem}"]
+        size = glyph.defaultSize()
+        glyph.render(painter, QRectF(x - head_x, y - head_y, size.width() * NOTE_SCALE, size.height() * NOTE_SCALE))
+
+class ExportJob:
+    # Renders a snapshot of a score on worker threads. PNG and SVG pages are written by the workers;
+    # PDF pages are recorded into QPictures in parallel, then played into one QPdfWriter in order.
+    def __init__(self, score, fmt, target, dpi=EXPORT_DPI, workers=None):
+        import threading
+        self.score = score.copy()
+        self.fmt = fmt
+        self.target = Path(target)
+        self.dpi = dpi
+        self.workers = workers or os.cpu_count() or 1
+        self.total = 0
+        self.progress = 0
+        self.outputs = []
+        self.error = None
+        self.cancelled = False
+        self.done = threading.Event()
+        self._lock = threading.Lock()
+        self._local = threading.local() # QSvgRenderers are QObjects: one set per worker thread
+        self._thread = threading.Thread(target=self._run, name="export", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        from concurrent.futures import ThreadPoolExecutor
+        try:
+            layout = ScoreLayout(self.score)
+            layout.update(max(1, self.score.measure_count()))
+            for system in range(layout.system_count()):
+                layout.system_geometry(system) # Fill the layout's caches before the workers share it
+            self.total = layout.page_count()
+            title = self.score.meta.get("title") or self.target.stem
+            if self.fmt != "pdf":
+                self.target.mkdir(parents=True, exist_ok=True)
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                pages = list(pool.map(lambda page: self._render(layout, page, title), range(self.total)))
+            if self.cancelled:
+                return
+            if self.fmt == "pdf":
+                self._write_pdf(pages, title)
+            else:
+                self.outputs = pages
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done.set()
+
+    def _renderers(self):
+        from PySide6.QtSvg import QSvgRenderer
+        renderers = getattr(self._local, "renderers", None)
+        if renderers is None:
+            renderers = self._local.renderers = {glyph: QSvgRenderer(str(ASSETS_DIR / name))
+                                                 for glyph, name in GLYPH_FILES.items()}
+        return renderers
+
+    @TRACER.traced("export page", "export")
+    def _render(self, layout, page, title):
+        from PySide6.QtCore import QSize, QRect
+        from PySide6.QtGui import QImage, QPainter, QPicture
+        from PySide6.QtSvg import QSvgGenerator
+        if self.cancelled:
+            return None
+        if self.fmt == "png":
+            scale = self.dpi / 96
+            result = self.target / f"{title}-{page + 1:03d}.png"
+            device = QImage(math.ceil(PAPER_W * scale), math.ceil(PAPER_H * scale), QImage.Format_RGB32)
+            device.setDotsPerMeterX(round(self.dpi / 0.0254))
+            device.setDotsPerMeterY(round(self.dpi / 0.0254))
+        elif self.fmt == "svg":
+            result = self.target / f"{title}-{page + 1:03d}.svg"
+            device = QSvgGenerator()
+            device.setFileName(str(result))
+            device.setSize(QSize(PAPER_W, PAPER_H))
+            device.setViewBox(QRect(0, 0, PAPER_W, PAPER_H))
+            device.setResolution(96)
+            device.setTitle(title)
+        else:
+            result = device = QPicture()
+        painter = QPainter(device)
+        painter.setRenderHint(QPainter.Antialiasing)
+        if self.fmt == "png":
+            painter.scale(scale, scale)
+        paint_page(painter, self.score, layout, page, self._renderers())
+        painter.end()
+        if self.fmt == "png" and not device.save(str(result)):
+            raise OSError(f"Could not write {result}")
+        with self._lock:
+            self.progress += 1
+        return result
+
+    def _write_pdf(self, pictures, title):
+        from PySide6.QtCore import QMarginsF
+        from PySide6.QtGui import QPainter, QPdfWriter, QPageSize
+        self.target.parent.mkdir(parents=True, exist_ok=True)
+        writer = QPdfWriter(str(self.target))
+        writer.setResolution(96) # Page coordinates are px at 96 dpi, so A4 is PAPER_W x PAPER_H
+        writer.setPageSize(QPageSize(QPageSize.A4))
+        writer.setPageMargins(QMarginsF(0, 0, 0, 0))
+        writer.setTitle(title)
+        painter = QPainter(writer)
+        for i, picture in enumerate(pictures):
+            if i:
+                writer.newPage()
+            painter.drawPicture(0, 0, picture)
+        painter.end()
+        self.outputs = [self.target]
+
+def export_cli():
+    # --export[=pdf|svg|png] score.zyq ... [--export-dir=DIR] [--dpi=300]: no window, one job per score
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    try:
+        from PySide6.QtGui import QGuiApplication
+    except:
+        exception_importing("export_cli")
+    app = QGuiApplication.instance() or QGuiApplication(sys.argv[:1])
+    fmt = _flag_value("--export", "pdf")
+    if fmt not in EXPORT_FORMATS:
+        print(f"[export] Unknown format {fmt!r}; use one of {', '.join(EXPORT_FORMATS)}", file=sys.stderr)
+        return 2
+    dpi = int(_flag_value("--dpi", EXPORT_DPI) or EXPORT_DPI)
+    failed = 0
+    for arg in sys.argv[1:]:
+        if arg.startswith("--"):
+            continue
+        path = Path(arg)
+        out_dir = Path(_flag_value("--export-dir", "") or path.parent)
+        target = out_dir / f"{path.stem}.pdf" if fmt == "pdf" else out_dir
+        start = time.perf_counter()
+        try:
+            score, _ = load_score(path)
+            score.meta.setdefault("title", path.stem)
+            job = ExportJob(score, fmt, target, dpi).start()
+            job.done.wait()
+            if job.error is not None:
+                raise job.error
+        except Exception as e:
+            print(f"[export] {path.name}: {e}", file=sys.stderr)
+            failed += 1
+            continue
+        print(f"[export] {path.name} -> {target} ({job.total} pages, {time.perf_counter() - start:.2f} s)")
+    return 1 if failed else 0
+
+
+# -- Playback --
+# Mono 16-bit PCM. A score's tempo is meta["tempo"] in quarter notes per minute.
+SAMPLE_RATE = 44100
+DEFAULT_TEMPO = 120
+PLAYBACK_BLOCK = 1024 # Frames per block handed to the audio device, about 23 ms
+
+def samples_per_tick(score, sample_rate=SAMPLE_RATE):
+    return sample_rate * 60 / (score.meta.get("tempo", DEFAULT_TEMPO) * TICKS_PER_QUARTER)
+
+class ScoreSynth:
+    # Renders a score block by block. Each distinct (pitch, length) is synthesized once as a whole waveform
+    # and mixed in by slices with NumPy, which req.txt installs. The plain-array path only serves runs
+    # without the bootstrapped packages and is far slower: a dense score can fall behind real time.
+    GAIN = 0.2 # Per voice, before the soft clip
+    ATTACK = 0.005 # Seconds
+    DECAY = 2.5 # Per second, exponential
+    RELEASE = 0.08 # Seconds a note rings on after its written end
+    HARMONICS = (1.0, 0.3, 0.1)
+    WAVES = 512 # Distinct waveforms kept
+
+    def __init__(self, score, start_tick=0, sample_rate=SAMPLE_RATE):
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        self.np = numpy
+        self.sample_rate = sample_rate
+        self.release = round(self.RELEASE * sample_rate)
+        spt = samples_per_tick(score, sample_rate)
+        self.notes = [] # (start frame, length in frames, MIDI key), in start order like the score's ticks
+        for i in range(len(score)):
+            start = round((score.ticks[i] - start_tick) * spt)
+            length = max(1, round(score.durations[i] * spt))
+            if start + length + self.release > 0: # Notes still ringing at the start tick join part way in
+                self.notes.append((start, length, step_to_midi(score.steps[i], score.alters[i])))
+        self.end = max((start + length + self.release for start, length, _ in self.notes), default=0)
+        self.position = 0
+        self._next = 0
+        self._active = [] # (start frame, waveform) of notes sounding in the current block
+        self._waves = OrderedDict()
+
+    def _wave(self, key, length):
+        wave = self._waves.get((key, length))
+        if wave is not None:
+            self._waves.move_to_end((key, length))
+            return wave
+        n, rate = length + self.release, self.sample_rate
+        freq = 440 * 2 ** ((key - 69) / 12)
+        partials = [(k * freq, amp) for k, amp in enumerate(self.HARMONICS, 1) if k * freq < rate / 2]
+        if self.np is not None:
+            np = self.np
+            t = np.arange(n) / rate
+            wave = sum(amp * np.sin(2 * np.pi * f * t) for f, amp in partials)
+            envelope = np.minimum(1, t / self.ATTACK) * np.exp(-self.DECAY * t)
+            envelope[length:] *= np.linspace(1, 0, self.release)
+            wave = (wave * envelope * self.GAIN).astype(np.float32)
+        else:
+            steps = [2 * math.pi * f / rate for f, _ in partials]
+            wave = array('f', bytes(4 * n))
+            for i in range(n):
+                t = i / rate
+                gain = min(1, t / self.ATTACK) * math.exp(-self.DECAY * t) * self.GAIN
+                if i >= length:
+                    gain *= (n - i) / self.release
+                wave[i] = gain * sum(amp * math.sin(step * i) for step, (_, amp) in zip(steps, partials))
+        self._waves[(key, length)] = wave
+        if len(self._waves) > self.WAVES:
+            self._waves.popitem(last=False)
+        return wave
+
+    def render(self, frames):
+        # The next `frames` frames as little-endian int16 bytes; b"" once the last note has rung out
+        p, q = self.position, self.position + frames
+        if p >= self.end:
+            return b""
+        while self._next < len(self.notes) and self.notes[self._next][0] < q:
+            start, length, key = self.notes[self._next]
+            self._active.append((start, self._wave(key, length)))
+            self._next += 1
+        np = self.np
+        block = np.zeros(frames, np.float32) if np is not None else [0.0] * frames
+        for start, wave in self._active:
+            lo, hi = max(p, start), min(q, start + len(wave))
+            if lo >= hi:
+                continue
+            if np is not None:
+                block[lo - p:hi - p] += wave[lo - start:hi - start]
+            else:
+                for i in range(lo, hi):
+                    block[i - p] += wave[i - start]
+        self._active = [(start, wave) for start, wave in self._active if start + len(wave) > q]
+        self.position = q
+        if np is not None:
+            return (np.tanh(block) * 32767).astype("<i2").tobytes()
+        pcm = array('h', [int(math.tanh(v) * 32767) for v in block])
+        if sys.byteorder != "little":
+            pcm.byteswap()
+        return pcm.tobytes()
+
+class Playback:
+    # Synthesis on its own thread, at most AHEAD seconds in front of what the audio device has taken
+    AHEAD = 0.3
+
+    def __init__(self, score, start_tick=0, sample_rate=SAMPLE_RATE):
+        import queue
+        import threading
+        self.score = score.copy()
+        self.start_tick = start_tick
+        self.sample_rate = sample_rate
+        self.samples_per_tick = samples_per_tick(score, sample_rate)
+        self.blocks = queue.Queue(maxsize=max(2, math.ceil(self.AHEAD * sample_rate / PLAYBACK_BLOCK)))
+        self.error = None
+        self.cancelled = False
+        self.done = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="playback", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        import queue
+        try:
+            synth = ScoreSynth(self.score, self.start_tick, self.sample_rate)
+            while not self.cancelled:
+                data = synth.render(PLAYBACK_BLOCK)
+                if not data:
+                    break
+                while not self.cancelled:
+                    try:
+                        self.blocks.put(data, timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done.set()
+
+
+def render_wav(score, path, sample_rate=SAMPLE_RATE):
+    # The whole score, as fast as it synthesizes; returns the length in seconds
+    import wave
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    synth = ScoreSynth(score, 0, sample_rate)
+    tmp = path.with_name(path.name + ".tmp")
+    with wave.open(str(tmp), "wb") as out:
+        out.setnchannels(1)
+        out.setsampwidth(2)
+        out.setframerate(sample_rate)
+        while True:
+            data = synth.render(16 * PLAYBACK_BLOCK)
+            if not data:
+                break
+            out.writeframes(data)
+    os.replace(tmp, path)
+    return synth.position / sample_rate
+
+def render_wav_cli():
+    # --render-wav score.zyq ... [--export-dir=DIR]: no window, <score>.wav next to each score
+    failed = 0
+    for arg in sys.argv[1:]:
+        if arg.startswith("--"):
+            continue
+        path = Path(arg)
+        target = Path(_flag_value("--export-dir", "") or path.parent) / f"{path.stem}.wav"
+        start = time.perf_counter()
+        try:
+            score, _ = load_score(path)
+            seconds = render_wav(score, target)
+        except Exception as e:
+            print(f"[export] {path.name}: {e}", file=sys.stderr)
+            failed += 1
+            continue
+        print(f"[export] {path.name} -> {target} ({seconds:.1f} s of audio in {time.perf_counter() - start:.2f} s)")
+    return 1 if failed else 0
+
+
+# -- Library --
+# LIBRARY_DIR/index.json: {path: {"stamp": [size, mtime_ns], "hash", "title", "pages", "modified", "thumbnail"}}.
+# Thumbnails are named after the hash of the file they show, so a renamed or copied score reuses its image.
+LIBRARY_THUMBNAIL_WIDTH = 120
+
+def read_library_index():
+    try:
+        return json.loads((LIBRARY_DIR / "index.json").read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return {}
+
+class LibraryIndexer:
+    # Brings the index in step with the .zyq files in a directory. Files whose size and mtime are unchanged
+    # are not opened again; new and changed ones are reported on `updates` as (path, entry or None if gone).
+    def __init__(self, directory=None):
+        import queue
+        import threading
+        self.directory = Path(directory or SCORES_DIR)
+        self.updates = queue.Queue()
+        self.indexed = 0
+        self.error = None
+        self.cancelled = False
+        self.done = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="library", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        try:
+            index = read_library_index()
+            entries = {}
+            self._by_hash = {entry["hash"]: entry for entry in index.values()} # Copies and renames are not laid out again
+            for path in sorted(self.directory.glob("*.zyq")):
+                if self.cancelled:
+                    return
+                key = str(path)
+                entry = index.get(key)
+                stat = path.stat()
+                stamp = [stat.st_size, stat.st_mtime_ns]
+                if (entry is None or entry["stamp"] != stamp
+                        or not (LIBRARY_DIR / "thumbnails" / entry["thumbnail"]).exists()):
+                    try:
+                        entry = self._index(path, stamp)
+                    except Exception as e:
+                        print(f"[main] Could not index {path.name}: {e}", file=sys.stderr)
+                        continue
+                    self.indexed += 1
+                    self._by_hash[entry["hash"]] = entry
+                    self.updates.put((key, entry))
+                entries[key] = entry
+            for key in index.keys() - entries.keys():
+                self.updates.put((key, None))
+            if entries != index:
+                LIBRARY_DIR.mkdir(parents=True, exist_ok=True)
+                _write_atomic(LIBRARY_DIR / "index.json", json.dumps(entries, indent=1).encode("utf-8"))
+                used = {entry["thumbnail"] for entry in entries.values()}
+                for thumbnail in (LIBRARY_DIR / "thumbnails").glob("*.png"):
+                    if thumbnail.name not in used:
+                        thumbnail.unlink()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done.set()
+
+    def _index(self, path, stamp):
+        digest = _sha256(path.read_bytes())
+        score, _ = load_score(path, replay=False)
+        score.detach() # Hold no mapping that would stop the editor replacing the file
+        measures = max(1, score.measure_count())
+        layout = ScoreLayout(score)
+        # The editor stores the page count when it saves; only older files are laid out in full
+        pages = score.meta.get("pages") or self._by_hash.get(digest, {}).get("pages")
+        if pages is None:
+            layout.update(measures)
+            pages = layout.page_count()
+        thumbnail = f"{digest}.png"
+        if not (LIBRARY_DIR / "thumbnails" / thumbnail).exists():
+            # Page 1 only depends on the measures that fill it: lay out more until a second page starts
+            shown = SYSTEMS_PER_PAGE * 8
+            while not layout.system_count() or (layout.page_count() < 2 and len(layout.widths) < measures):
+                layout.update(min(shown, measures))
+                shown *= 2
+            self._render_thumbnail(score, layout, LIBRARY_DIR / "thumbnails" / thumbnail)
+        return {"stamp": stamp, "hash": digest, "title": score.meta.get("title") or path.stem,
+                "pages": pages, "modified": stamp[1] / 1e9, "thumbnail": thumbnail}
+
+    def _render_thumbnail(self, score, layout, target):
+        from PySide6.QtGui import QImage, QPainter
+        from PySide6.QtSvg import QSvgRenderer
+        if not hasattr(self, "_renderers"): # QObjects: made on this thread, used only here
+            self._renderers = {glyph: QSvgRenderer(str(ASSETS_DIR / name)) for glyph, name in GLYPH_FILES.items()}
+        scale = LIBRARY_THUMBNAIL_WIDTH / PAPER_W
+        image = QImage(LIBRARY_THUMBNAIL_WIDTH, math.ceil(PAPER_H * scale), QImage.Format_RGB32)
+        image.fill(0xFFFFFFFF) # The page covers all but a rounded-up last row
+        painter = QPainter(image)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.scale(scale, scale)
+        paint_page(painter, score, layout, 0, self._renderers)
+        painter.end()
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(target.name + ".tmp")
+        if not image.save(str(tmp), "PNG"):
+            raise OSError(f"Could not write {tmp}")
+        os.replace(tmp, target)
+
+
+# -- Benchmark --
+# --benchmark[=benchmark.json] [--benchmark-baseline=benchmark_baseline.json]: runs offscreen and drives the
+# real ScoreEditor. Every metric is lower-is-better; the first run without a baseline stores one.
+BENCHMARK_BASELINE = Path(__file__).resolve().parent / "benchmark_baseline.json"
+BENCHMARK_TOLERANCE = 0.10 # Slower than the baseline by more than this counts as a regression
+BENCHMARK_TAILS = (".p95_ms", ".max_ms")
+BENCHMARK_SHAPES = ("scroll.pages", "items.") # Follow the layout of the test score, not the speed of the code
+
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError: # Windows
+        import ctypes
+        from ctypes import wintypes
+
+        class Counters(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + \
+                       [(name, ctypes.c_size_t) for name in ("PeakWorkingSetSize", "WorkingSetSize",
+                        "QuotaPeakPagedPoolUsage", "QuotaPagedPoolUsage", "QuotaPeakNonPagedPoolUsage",
+                        "QuotaNonPagedPoolUsage", "PagefileUsage", "PeakPagefileUsage")]
+        counters = Counters()
+        counters.cb = ctypes.sizeof(counters)
+        ctypes.windll.psapi.GetProcessMemoryInfo(ctypes.windll.kernel32.GetCurrentProcess(),
+                                                 ctypes.byref(counters), counters.cb)
+        return counters.PeakWorkingSetSize / 2 ** 20
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 1024 # Bytes on macOS, KiB elsewhere
+
+def _timings(prefix, samples):
+    samples = sorted(samples)
+    return {f"{prefix}.median_ms": round(samples[len(samples) // 2] * 1000, 3),
+            f"{prefix}.p95_ms": round(samples[int(len(samples) * 0.95)] * 1000, 3),
+            f"{prefix}.max_ms": round(samples[-1] * 1000, 3)}
+
+def benchmark_startup(runs=3):
+    # Separate processes up to the first paint; the first is as cold as it gets without dropping OS caches
+    import tempfile
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen", ZUOYUEQU_OFFLINE_FIRST="1")
+    totals = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for run in range(runs):
+            out = Path(tmp) / f"startup{run}.json"
+            subprocess.run([sys.executable, str(Path(__file__).resolve()), f"--profile-startup={out}", "--profile-exit"],
+                           env=env, check=True, capture_output=True)
+            totals.append(json.loads(out.read_text(encoding="utf-8"))["total_ms"])
+    return {"startup.cold_ms": totals[0], "startup.warm_ms": min(totals[1:])}
+
+def compare_benchmark(metrics, baseline):
+    # (name, baseline, current, relative change) for every metric both runs have, and the regressions among them.
+    # Tail latencies are reported but do not count: a handful of samples on a busy machine swings them by 50%.
+    # Neither do page and item counts, which a spacing change moves either way.
+    rows = []
+    for name, value in metrics.items():
+        base = baseline.get(name)
+        if isinstance(base, (int, float)) and base > 0:
+            rows.append((name, base, value, value / base - 1))
+    return rows, [row for row in rows if row[3] > BENCHMARK_TOLERANCE and not row[0].endswith(BENCHMARK_TAILS)
+                  and not row[0].startswith(BENCHMARK_SHAPES)]
+
+def run_benchmark(ui, startup):
+    # Called by main() once the window is up
+    import shutil
+    import tempfile
+    from PySide6.QtCore import Qt, QEvent
+    from PySide6.QtGui import QKeyEvent
+    editor, view, app = ui.editor, ui.editor.view, ui.app
+    editor.scores_dir = Path(tempfile.mkdtemp(prefix="zuoyuequ-benchmark-")) # Keep benchmark scores out of the user's
+    app.aboutToQuit.connect(lambda: shutil.rmtree(editor.scores_dir, ignore_errors=True))
+    editor.autosave_timer.stop()
+    ui.show_editor()
+    metrics = dict(startup)
+
+    def frame():
+        # Deferred work (virtualization, scrolling) and then a synchronous paint of the viewport
+        app.processEvents()
+        view.viewport().repaint()
+
+    for count in (10000, 100000):
+        editor._set_score(Score(), None)
+        start = time.perf_counter()
+        for i in range(count):
+            editor.add_note(i * SLOT_TICKS, TOP_LINE_STEP - 4 - i % 8, SLOT_TICKS)
+        elapsed = time.perf_counter() - start
+        metrics[f"add_note_{count // 1000}k.total_s"] = round(elapsed, 3)
+        metrics[f"add_note_{count // 1000}k.per_note_us"] = round(elapsed / count * 1e6, 3)
+        editor._set_score(Score(), None)
+        start = time.perf_counter()
+        editor.add_notes((i * SLOT_TICKS, TOP_LINE_STEP - 4 - i % 8, SLOT_TICKS) for i in range(count))
+        metrics[f"add_notes_{count // 1000}k.total_s"] = round(time.perf_counter() - start, 3)
+    frame()
+
+    # Key press to painted frame, through the global key dispatcher
+    target = app.focusWidget() or view
+    samples = []
+    for i in range(400):
+        key = (Qt.Key_Right, Qt.Key_Up, Qt.Key_Left, Qt.Key_Down)[i // 100]
+        start = time.perf_counter()
+        app.sendEvent(target, QKeyEvent(QEvent.KeyPress, key, Qt.NoModifier))
+        frame()
+        samples.append(time.perf_counter() - start)
+    metrics.update(_timings("cursor_move", samples))
+
+    view.centerOn(PAPER_W / 2, 0)
+    frame()
+    bar = view.verticalScrollBar()
+    samples = []
+    for _ in range(300):
+        start = time.perf_counter()
+        bar.setValue(bar.value() + view.viewport().height() // 3)
+        frame()
+        samples.append(time.perf_counter() - start)
+    metrics.update(_timings("scroll_frame", samples))
+    metrics["scroll.pages"] = editor.page_count
+
+    samples = []
+    for scale in (0.1, 1.0, 4.0, 1.0):
+        view.zoom_to(scale)
+        while view.zoom_timer.isActive():
+            start = time.perf_counter()
+            view._zoom_frame()
+            frame()
+            samples.append(time.perf_counter() - start)
+        metrics[f"items.at_{scale:g}x"] = len(editor.scene.items())
+    metrics.update(_timings("zoom_frame", samples))
+
+    # A minute of playback audio, which has to stay far under a minute to keep up on slow machines
+    synth = ScoreSynth(editor.score)
+    start = time.perf_counter()
+    for _ in range(60 * SAMPLE_RATE // PLAYBACK_BLOCK):
+        synth.render(PLAYBACK_BLOCK)
+    metrics["synth_60s.total_s"] = round(time.perf_counter() - start, 3)
+    metrics["peak_rss_mb"] = round(_peak_rss_mb(), 1)
+
+    out = Path(_flag_value("--benchmark", "benchmark.json"))
+    baseline_path = Path(_flag_value("--benchmark-baseline", "") or BENCHMARK_BASELINE)
+    report = {"python": sys.version.split()[0], "platform": sys.platform, "metrics": metrics}
+    regressions = []
+    if baseline_path.exists():
+        rows, regressions = compare_benchmark(metrics, json.loads(baseline_path.read_text(encoding="utf-8"))["metrics"])
+        report["baseline"] = {name: {"baseline": base, "change": round(change, 4)} for name, base, _, change in rows}
+        for name, base, value, change in rows:
+            flag = "  REGRESSION" if (name, base, value, change) in regressions else ""
+            print(f"[benchmark] {name:<28} {base:>12g} -> {value:>12g} {change:+8.1%}{flag}")
+    else:
+        _write_atomic(baseline_path, json.dumps(report, indent=1).encode("utf-8"))
+        print(f"[benchmark] Stored baseline {baseline_path}")
+    _write_atomic(out, json.dumps(report, indent=1).encode("utf-8"))
+    print(f"[benchmark] Wrote {out}; {len(regressions)} regression(s)")
+    app.exit(1 if regressions else 0)
+
+
+def load_key_bindings():
+    # Defaults merged with the user's file; a null command unbinds the key
+    bindings = dict(DEFAULT_KEY_BINDINGS)
+    try:
+        user = json.loads(KEY_BINDINGS_FILE.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return bindings
+    except (OSError, ValueError) as e:
+        print(f"[main] Ignoring {KEY_BINDINGS_FILE.name}: {e}")
+        return bindings
+    for key, command in user.items():
+        if command is None:
+            bindings.pop(key, None)
+        else:
+            bindings[key] = str(command).upper()
+    return bindings
+
 def get_nav_bar(view_switcher):
     try:
-        from PySide6.QtWidgets import QWidget, QHBoxLayout, QPushButton, QButtonGroup
+        from PySide6.QtWidgets import QWidget, QHBoxLayout, QPushButton, QButtonGroup, QLabel
     except:
         exception_importing("get_nav_bar")
     nav_bar = QWidget()
@@ -170,6 +2173,12 @@ def get_nav_bar(view_switcher):
     nav_bar.button_group = button_group # Attach for external access
     nav_layout.addStretch() # Push buttons to the left
 
+    notice_label = QLabel()
+    notice_label.setObjectName("NoticeLabel")
+    notice_label.hide()
+    nav_layout.addWidget(notice_label)
+    nav_bar.notice_label = notice_label
+
     nav_style = """
         QPushButton {
             border: 3px solid transparent;
@@ -184,16 +2193,21 @@ def get_nav_bar(view_switcher):
             background-color: #e5eef5;
             border-bottom: 3px solid #5ab1ef;
         }
+        #NoticeLabel {
+            padding: 0 16px;
+            font-size: 13px;
+            color: #2f6f9f;
+        }
     """
     nav_bar.setStyleSheet(nav_style)
     # Button click handling
     button_group.idClicked.connect(view_switcher.setCurrentIndex)
     return nav_bar
 
-def get_home(view_switcher, nav_bar):
+def get_home():
     try:
-        from PySide6.QtWidgets import QWidget, QLabel, QVBoxLayout, QHBoxLayout
-        from PySide6.QtCore import QSize, Qt
+        from PySide6.QtWidgets import QWidget, QLabel, QVBoxLayout, QHBoxLayout, QStyle, QListView
+        from PySide6.QtCore import QSize, Qt, Signal, QAbstractListModel, QModelIndex, QTimer
         from PySide6.QtGui import QIcon, QMouseEvent
     except:
         exception_importing("get_home")
@@ -208,7 +2222,9 @@ def get_home(view_switcher, nav_bar):
     home_layout.addWidget(scores_label)
 
     class ClickableButton(QWidget):
-        def __init__(self, parent=None):
+        clicked = Signal()
+
+        def __init__(self, text, icon, parent=None):
             super().__init__(parent)
             self.setObjectName("ClickableButton")
             self.setAttribute(Qt.WA_StyledBackground, True)
@@ -237,9 +2253,9 @@ def get_home(view_switcher, nav_bar):
             layout.setContentsMargins(24, 0, 0, 0)
             layout.setSpacing(16)
             icon_label = QLabel()
-            icon_pix = QIcon(str(ASSETS_DIR / "new_score.svg")).pixmap(QSize(32, 50))
+            icon_pix = icon.pixmap(QSize(32, 50))
             icon_label.setPixmap(icon_pix)
-            text_label = QLabel("New Score")
+            text_label = QLabel(text)
             text_label.setStyleSheet("font-size: 20px;")
             layout.addWidget(icon_label)
             layout.addWidget(text_label)
@@ -254,75 +2270,572 @@ def get_home(view_switcher, nav_bar):
 
         def mousePressEvent(self, event: QMouseEvent):
             if event.button() == Qt.LeftButton:
-                # Switch the StackedWidget to Index 1 (Score View)
-                view_switcher.setCurrentIndex(1)
-                
-                # 2. Update the Nav Bar visuals so "Score" is selected
-                # We access the 'button_group' attribute we added to nav_bar
-                if hasattr(nav_bar, 'button_group'):
-                    nav_bar.button_group.button(1).setChecked(True)
-            
+                self.clicked.emit()
             event.accept()
-    new_score_button = ClickableButton()
+
+    new_score_button = ClickableButton("New Score", QIcon(str(ASSETS_DIR / "new_score.svg")))
     home_layout.addWidget(new_score_button)
+    import_button = ClickableButton("Import MusicXML or MIDI", home_tab.style().standardIcon(QStyle.SP_DialogOpenButton))
+    home_layout.addWidget(import_button)
+
+    class LibraryModel(QAbstractListModel):
+        # Saved scores, newest first. Thumbnails are loaded when a row is first painted and kept in a small LRU,
+        # so a library of thousands costs only the rows on screen
+        ICONS = 256
+
+        def __init__(self, entries, parent=None):
+            super().__init__(parent)
+            self.entries = entries # path -> index entry
+            self.order = sorted(entries, key=self._sort_key)
+            self.keys = [self._sort_key(path) for path in self.order] # For bisecting new rows into place
+            self._icons = OrderedDict()
+
+        def _sort_key(self, path):
+            return (-self.entries[path]["modified"], path)
+
+        def rowCount(self, parent=QModelIndex()):
+            return 0 if parent.isValid() else len(self.order)
+
+        def data(self, index, role=Qt.DisplayRole):
+            path = self.order[index.row()]
+            entry = self.entries[path]
+            if role == Qt.DisplayRole:
+                pages = f"{entry['pages']} page" + ("s" if entry["pages"] != 1 else "")
+                modified = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry["modified"]))
+                return f"{entry['title']}\n{pages} · {modified}"
+            if role == Qt.DecorationRole:
+                icon = self._icons.get(entry["thumbnail"])
+                if icon is None:
+                    icon = self._icons[entry["thumbnail"]] = QIcon(str(LIBRARY_DIR / "thumbnails" / entry["thumbnail"]))
+                    if len(self._icons) > self.ICONS:
+                        self._icons.popitem(last=False)
+                self._icons.move_to_end(entry["thumbnail"])
+                return icon
+            if role in (Qt.UserRole, Qt.ToolTipRole):
+                return path
+            return None
 
-    home_layout.addStretch()
+        def apply(self, path, entry):
+            # One indexer update: a row is dropped and, unless the file is gone, put back where it now sorts
+            if path in self.entries:
+                row = self.order.index(path)
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del self.order[row], self.keys[row], self.entries[path]
+                self.endRemoveRows()
+            if entry is not None:
+                self.entries[path] = entry
+                key = self._sort_key(path)
+                row = bisect_left(self.keys, key)
+                self.beginInsertRows(QModelIndex(), row, row)
+                self.order.insert(row, path)
+                self.keys.insert(row, key)
+                self.endInsertRows()
+
+    library_model = LibraryModel(read_library_index(), home_tab)
+    library = QListView()
+    library.setModel(library_model)
+    library.setUniformItemSizes(True) # Row heights are never measured, however many there are
+    library.setVerticalScrollMode(QListView.ScrollPerPixel)
+    library.setIconSize(QSize(48, 68))
+    library.setSpacing(2)
+    library.setStyleSheet("QListView { border: none; background-color: #e5e9ed; font-size: 14px; margin-top: 16px; }")
+    home_layout.addWidget(library, 1)
+
+    # The index on disk shows at once; the indexer then only re-reads what changed since
+    home_tab.indexer = None
+    index_timer = QTimer(home_tab)
+    index_timer.setInterval(100)
+
+    def refresh():
+        if home_tab.indexer is None:
+            home_tab.indexer = LibraryIndexer().start()
+            index_timer.start()
+
+    def poll_indexer():
+        job = home_tab.indexer
+        while not job.updates.empty():
+            library_model.apply(*job.updates.get_nowait())
+        if job.done.is_set() and job.updates.empty():
+            index_timer.stop()
+            home_tab.indexer = None
+            if job.error is not None:
+                print(f"[main] Library indexing failed: {job.error}", file=sys.stderr)
+
+    index_timer.timeout.connect(poll_indexer)
+
+    # main() connects these once the document tabs exist
+    home_tab.new_score_button = new_score_button
+    home_tab.import_button = import_button
+    home_tab.library = library
+    home_tab.refresh = refresh
     return home_tab
 
-def main():
-    print("[main] Starting...")
+def get_publish(current_score):
     try:
-        from PySide6.QtWidgets import (QApplication, QLabel, QWidget, QVBoxLayout, QHBoxLayout, 
-                                       QStackedWidget, QSizePolicy, QGraphicsView, QGraphicsScene, 
-                                       QGraphicsRectItem, QGraphicsLineItem, QPushButton)
-        from PySide6.QtCore import Qt, QObject, QEvent, Signal
-        from PySide6.QtGui import QKeySequence, QFont, QPainter, QBrush, QColor, QPen
-        from PySide6.QtSvgWidgets import QGraphicsSvgItem
-        from PySide6.QtSvg import QSvgRenderer
-    except Exception as e:
-        print(e)
-        exception_importing("main")
+        from PySide6.QtWidgets import (QWidget, QLabel, QVBoxLayout, QHBoxLayout, QComboBox, QSpinBox,
+                                       QPushButton, QProgressBar, QFileDialog)
+        from PySide6.QtCore import QTimer
+    except:
+        exception_importing("get_publish")
+
+    publish_tab = QWidget()
+    publish_tab.setStyleSheet("background-color: #e5e9ed;")
+    publish_layout = QVBoxLayout(publish_tab)
+    publish_layout.setContentsMargins(50, 100, 50, 0)
+
+    publish_label = QLabel("Publish")
+    publish_label.setStyleSheet("font-size: 24px; font-weight: bold; margin-bottom: 20px;")
+    publish_layout.addWidget(publish_label)
+
+    options = QHBoxLayout()
+    format_box = QComboBox()
+    format_box.addItems(["PDF", "SVG, one file per page", "PNG, one file per page"])
+    dpi_box = QSpinBox()
+    dpi_box.setRange(72, 1200)
+    dpi_box.setValue(EXPORT_DPI)
+    dpi_box.setSuffix(" dpi")
+    export_button = QPushButton("Export...")
+    cancel_button = QPushButton("Cancel")
+    cancel_button.setEnabled(False)
+    for widget in (QLabel("Format"), format_box, QLabel("Resolution"), dpi_box, export_button, cancel_button):
+        options.addWidget(widget)
+    options.addStretch()
+    publish_layout.addLayout(options)
+
+    progress_bar = QProgressBar()
+    progress_bar.hide()
+    publish_layout.addWidget(progress_bar)
+    status_label = QLabel()
+    publish_layout.addWidget(status_label)
+    publish_layout.addStretch()
+
+    # The job renders on its own threads; the tab only polls it
+    publish_tab.job = None
+    poll_timer = QTimer(publish_tab)
+    poll_timer.setInterval(50)
+
+    def export():
+        fmt = EXPORT_FORMATS[format_box.currentIndex()]
+        score = current_score()
+        title = score.meta.get("title", "Untitled")
+        if fmt == "pdf":
+            target, _ = QFileDialog.getSaveFileName(publish_tab, "Export PDF", str(Path.home() / f"{title}.pdf"), "PDF (*.pdf)")
+        else:
+            target = QFileDialog.getExistingDirectory(publish_tab, f"Export {fmt.upper()} pages to", str(Path.home()))
+        if not target:
+            return
+        publish_tab.job = ExportJob(score, fmt, target, dpi_box.value()).start()
+        export_button.setEnabled(False)
+        cancel_button.setEnabled(True)
+        progress_bar.setValue(0)
+        progress_bar.show()
+        status_label.setText(f"Exporting {title}...")
+        poll_timer.start()
+
+    def poll():
+        job = publish_tab.job
+        progress_bar.setMaximum(max(job.total, 1))
+        progress_bar.setValue(job.progress)
+        if not job.done.is_set():
+            return
+        poll_timer.stop()
+        publish_tab.job = None
+        export_button.setEnabled(True)
+        cancel_button.setEnabled(False)
+        progress_bar.hide()
+        if job.error is not None:
+            status_label.setText(f"Export failed: {job.error}")
+        elif job.cancelled:
+            status_label.setText("Export cancelled.")
+        else:
+            status_label.setText(f"Exported {job.total} pages to {job.target}")
+
+    def cancel():
+        if publish_tab.job is not None:
+            publish_tab.job.cancelled = True
+            status_label.setText("Cancelling...")
+
+    export_button.clicked.connect(export)
+    cancel_button.clicked.connect(cancel)
+    poll_timer.timeout.connect(poll)
+    return publish_tab
+
+def main(update_check=None, driver=None):
+    print("[main] Starting...")
+    with PROFILER.phase("main: PySide6 imports"):
+        try:
+            from PySide6.QtWidgets import (QApplication, QWidget, QVBoxLayout, QHBoxLayout, 
+                                           QStackedWidget, QSizePolicy, QGraphicsView, QGraphicsScene, 
+                                           QPushButton, QGraphicsItem, QFileDialog, QTabWidget)
+            from PySide6.QtCore import Qt, QObject, QEvent, Signal, QTimer, QRectF, QPointF, QPoint, QSize
+            from PySide6.QtGui import (QKeySequence, QFont, QFontMetrics, QPainter, QColor, QPen, QImage,
+                                       QPixmap, QPainterPath, QTransform)
+            from PySide6.QtSvg import QSvgRenderer
+        except Exception as e:
+            print(e)
+            exception_importing("main")
 
     class GlobalInput(QObject):
-        command = Signal(str)
+        command = Signal(str, int) # Command, number of key presses it stands for
+        FRAME_MS = 16
+        KEYPAD = Qt.KeypadModifier.value # Keypad Enter and arrows bind like the main ones
+
+        def __init__(self, bindings):
+            super().__init__()
+            # Parse the key names once; dispatch is a dict lookup on the combined key|modifier int
+            self.table = {}
+            for name, cmd in bindings.items():
+                seq = QKeySequence(name)
+                if seq.count() == 1:
+                    self.table[seq[0].toCombined()] = cmd
+                else:
+                    print(f"[main] Unknown key binding: {name!r}")
+            self.pending = {} # Auto-repeated command -> count, emitted once per frame
+            self.window = None # Keys typed into other windows, like file dialogs, are left alone
+            self.score_view_active = lambda: True
+            self.flush_timer = QTimer(self)
+            self.flush_timer.setSingleShot(True)
+            self.flush_timer.setInterval(self.FRAME_MS)
+            self.flush_timer.timeout.connect(self.flush)
+
+        def flush(self):
+            pending, self.pending = self.pending, {}
+            for cmd, count in pending.items():
+                self.command.emit(cmd, count)
 
         def eventFilter(self, obj, event):
-            # Only KeyPress events
-            if event.type() == QEvent.KeyPress:
-                if obj is not app.focusWidget() and app.focusWidget() is not None:
-                    return False # Let focused widget handle it
-                key_str = QKeySequence(event.key()).toString()
-                if key_str == 'Up':
-                    self.command.emit("UP")
-                    return True
-                elif key_str == 'Down':
-                    self.command.emit("DOWN")
-                    return True
-                elif key_str == 'Return' or key_str == 'Enter':
-                    self.command.emit("ENTER")
-                    return True
-                elif key_str == 'Esc':
-                    app.quit()
-                    return True
-            return False
+            if event.type() != QEvent.KeyPress:
+                return False
+            focus = app.focusWidget()
+            if focus is not None and obj is not focus:
+                return False # Let focused widget handle it
+            cmd = self.table.get(event.keyCombination().toCombined() & ~self.KEYPAD)
+            if cmd is None or not self.applies(cmd, focus):
+                return False
+            frame_stats.input(time.perf_counter())
+            if event.isAutoRepeat() and cmd in REPEAT_COMMANDS:
+                self.pending[cmd] = self.pending.get(cmd, 0) + 1
+                if not self.flush_timer.isActive():
+                    self.flush_timer.start()
+                return True
+            # Keep order: whatever a held key queued happens before this press
+            self.flush_timer.stop()
+            self.flush()
+            self.command.emit(cmd, 1)
+            return True
+
+        def applies(self, cmd, focus):
+            # Outside the score view arrows, Space, Del and the clipboard keys belong to the focused widget
+            if focus is not None and self.window is not None and focus.window() is not self.window:
+                return False
+            return cmd in APP_COMMANDS or self.score_view_active()
     
+    class GlyphCache:
+        # SVG glyphs rasterized once per (glyph, on-screen scale, device pixel ratio), least recently used evicted first
+        SCALE_STEPS = 8 # Cache buckets per doubling of the on-screen scale
+
+        def __init__(self, max_pixels=8 * 1024 * 1024):
+            self.renderers = {}
+            self.max_pixels = max_pixels
+            self.pixels = 0
+            self.hits = 0
+            self.misses = 0
+            self._pixmaps = OrderedDict()
+
+        def load(self, glyph, path):
+            if glyph not in self.renderers:
+                self.renderers[glyph] = QSvgRenderer(str(path))
+            return self.renderers[glyph]
+
+        def size(self, glyph):
+            return self.renderers[glyph].defaultSize()
+
+        def pixmap(self, glyph, scale, dpr):
+            bucket = round(math.log2(max(scale, 1e-3)) * self.SCALE_STEPS)
+            key = (glyph, bucket, dpr)
+            pixmap = self._pixmaps.get(key)
+            if pixmap is not None:
+                self.hits += 1
+                self._pixmaps.move_to_end(key)
+                return pixmap
+            self.misses += 1
+            size = self.size(glyph)
+            factor = 2 ** (bucket / self.SCALE_STEPS) * dpr
+            image = QImage(max(1, math.ceil(size.width() * factor)), max(1, math.ceil(size.height() * factor)),
+                           QImage.Format_ARGB32_Premultiplied)
+            image.fill(Qt.transparent)
+            painter = QPainter(image)
+            painter.setRenderHint(QPainter.Antialiasing)
+            self.renderers[glyph].render(painter)
+            painter.end()
+            pixmap = QPixmap.fromImage(image)
+            self._pixmaps[key] = pixmap
+            self.pixels += image.width() * image.height()
+            while self.pixels > self.max_pixels and len(self._pixmaps) > 1:
+                _, evicted = self._pixmaps.popitem(last=False)
+                self.pixels -= evicted.width() * evicted.height()
+            return pixmap
+
+        def hit_rate(self):
+            total = self.hits + self.misses
+            return self.hits / total if total else 0.0
+
+    class PerfHUD(QWidget):
+        # Opt-in numbers over the score view (ZUOYUEQU_HUD=1 or F12), refreshed a few times a second.
+        # Painted by hand: a style sheet would make it non-opaque, and every refresh would repaint the score under it
+        REFRESH_MS = 250
+        MARGIN = 6
+
+        def __init__(self, view):
+            super().__init__(view) # On the view, not its viewport, so scrolling does not move it
+            self.view = view
+            self.lines = []
+            self.font = QFont("Monospace", 9)
+            self.font.setStyleHint(QFont.TypeWriter)
+            self.setAttribute(Qt.WA_TransparentForMouseEvents)
+            self.setAttribute(Qt.WA_OpaquePaintEvent)
+            self.timer = QTimer(self)
+            self.timer.setInterval(self.REFRESH_MS)
+            self.timer.timeout.connect(self.refresh)
+            self.hide()
+
+        def toggle(self):
+            self.set_enabled(self.isHidden())
+
+        def attach(self, view):
+            # Follows the shown document; reparenting hides it
+            enabled = not self.isHidden()
+            self.setParent(view)
+            self.view = view
+            self.set_enabled(enabled)
+
+        def set_enabled(self, enabled):
+            self.setVisible(enabled)
+            if enabled:
+                self.refresh()
+                self.timer.start()
+            else:
+                self.timer.stop()
+
+        def refresh(self):
+            def ms(samples):
+                if not samples:
+                    return f"{'-':>7}    {'-':>7}    "
+                return f"{sum(samples) / len(samples) * 1000:7.1f} avg{max(samples) * 1000:7.1f} max"
+            frames = frame_stats.frames
+            fps = len(frames) / sum(frames) if frames else 0
+            viewport = self.view.viewport()
+            visible = len(self.view.items(viewport.rect()))
+            self.lines = [
+                f"frame  {ms(frames)} ms  {fps:4.0f} fps",
+                f"paint  {ms(frame_stats.paints)} ms",
+                f"input  {ms(frame_stats.latencies)} ms to paint",
+                f"items  {visible} visible / {len(self.view.scene().items())} in scene",
+                f"glyphs {glyph_cache.hit_rate():.1%} cache hits, {glyph_cache.misses} rasterized",
+            ]
+            metrics = QFontMetrics(self.font)
+            width = max(metrics.horizontalAdvance(line) for line in self.lines) + 2 * self.MARGIN
+            size = QSize(width, metrics.lineSpacing() * len(self.lines) + 2 * self.MARGIN)
+            if size != self.size():
+                self.resize(size)
+            self.move(viewport.geometry().topLeft() + QPoint(8, 8))
+            self.raise_()
+            self.update()
+
+        def paintEvent(self, event):
+            painter = QPainter(self)
+            painter.fillRect(self.rect(), QColor("#202124"))
+            painter.setPen(QColor("#e8eaed"))
+            painter.setFont(self.font)
+            metrics = painter.fontMetrics()
+            for i, line in enumerate(self.lines):
+                painter.drawText(self.MARGIN, self.MARGIN + metrics.ascent() + i * metrics.lineSpacing(), line)
+            painter.end()
+
+    class GlyphItem(QGraphicsItem):
+        # Blits a cached pixmap of the glyph at the current zoom instead of re-rendering the SVG
+        SIMPLE_SCALE = 0.2 # Below this on-screen scale a note is drawn as a plain notehead
+
+        def __init__(self, glyph, parent=None):
+            super().__init__(parent)
+            self.glyph = glyph
+            self.head = None # Notehead rect in glyph coordinates, for the simplified drawing
+            self._rect = QRectF(0, 0, glyph_cache.size(glyph).width(), glyph_cache.size(glyph).height())
+
+        def set_glyph(self, glyph):
+            self.prepareGeometryChange()
+            self.glyph = glyph
+            self._rect = QRectF(0, 0, glyph_cache.size(glyph).width(), glyph_cache.size(glyph).height())
+
+        def boundingRect(self):
+            return self._rect
+
+        def paint(self, painter, option, widget=None):
+            transform = painter.worldTransform()
+            scale = math.hypot(transform.m11(), transform.m12())
+            if self.head is not None and scale < self.SIMPLE_SCALE:
+                painter.setPen(Qt.NoPen)
+                painter.setBrush(Qt.black)
+                painter.drawEllipse(self.head)
+                return
+            pixmap = glyph_cache.pixmap(self.glyph, scale, painter.device().devicePixelRatioF())
+            painter.setRenderHint(QPainter.SmoothPixmapTransform)
+            painter.drawPixmap(self._rect, pixmap, QRectF(pixmap.rect()))
+
+    class PageItem(QGraphicsItem):
+        # The white page with all of its staff lines and barlines in one cached path
+        THUMBNAIL_RES = 0.4 # Pixels per scene unit of the zoomed-out page image
+
+        def __init__(self, parent=None):
+            super().__init__(parent)
+            self._rect = QRectF(0, 0, PAPER_W, PAPER_H)
+            self._path = QPainterPath()
+            self._pen = QPen(Qt.GlobalColor.black, 1)
+            self._clef_tops = []
+            self._heads = None # Thumbnail mode: notehead centres drawn into the page image, no note items
+            self._thumbnail = None
+
+        def set_systems(self, systems):
+            # systems: [(top line y, left x, right x, [barline x, ...]), ...]
+            path = QPainterPath()
+            self._clef_tops = [system[0] for system in systems]
+            for top, left, right, barlines in systems:
+                for i in range(5):
+                    y = top + i * LINE_SPACING
+                    path.moveTo(left, y)
+                    path.lineTo(right, y)
+                for x in barlines:
+                    path.moveTo(x, top)
+                    path.lineTo(x, top + 4 * LINE_SPACING)
+            self._path = path
+            self._thumbnail = None
+            self.update()
+
+        def set_heads(self, heads):
+            # heads: [(x, y), ...] notehead centres, or None to leave thumbnail mode
+            self._heads = heads
+            self._thumbnail = None
+            self.update()
+
+        def boundingRect(self):
+            return self._rect
+
+        def paint(self, painter, option, widget=None):
+            if self._heads is None:
+                transform = painter.worldTransform()
+                self._paint_page(painter, math.hypot(transform.m11(), transform.m12()), painter.device().devicePixelRatioF())
+                return
+            if self._thumbnail is None:
+                self._thumbnail = self._render_thumbnail()
+            painter.setRenderHint(QPainter.SmoothPixmapTransform)
+            painter.drawPixmap(self._rect, self._thumbnail, QRectF(self._thumbnail.rect()))
+
+        def _render_thumbnail(self):
+            res = self.THUMBNAIL_RES
+            image = QImage(math.ceil(PAPER_W * res), math.ceil(PAPER_H * res), QImage.Format_RGB32)
+            painter = QPainter(image)
+            painter.setRenderHint(QPainter.Antialiasing)
+            painter.scale(res, res)
+            self._paint_page(painter, res, 1.0)
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(Qt.black)
+            for x, y in self._heads:
+                painter.drawEllipse(QRectF(x - 6.5, y - 5, 13, 10))
+            painter.end()
+            return QPixmap.fromImage(image)
+
+        def _paint_page(self, painter, scale, dpr):
+            painter.fillRect(self._rect, Qt.white)
+            painter.setPen(self._pen)
+            painter.drawPath(self._path)
+            # A treble clef opens every system, blitted from the glyph cache like the notes
+            if self._clef_tops:
+                size = glyph_cache.size("treble")
+                pixmap = glyph_cache.pixmap("treble", scale * CLEF_SCALE, dpr)
+                painter.setRenderHint(QPainter.SmoothPixmapTransform)
+                for top in self._clef_tops:
+                    target = QRectF(CLEF_X, top + CLEF_DY, size.width() * CLEF_SCALE, size.height() * CLEF_SCALE)
+                    painter.drawPixmap(target, pixmap, QRectF(pixmap.rect()))
+
     class InteractiveView(QGraphicsView):
+        viewport_changed = Signal() # Scrolled, resized or zoomed
+        clicked = Signal(QPointF) # Scene position of a click that did not turn into a drag
+        MIN_SCALE = 0.1
+        MAX_SCALE = 8.0
+        ZOOM_STEP = 1.15 # Per wheel notch
+        ZOOM_EASE = 0.35 # Fraction of the remaining distance covered each frame
+
         def __init__(self, scene, parent=None):
             super().__init__(scene, parent)
             self.setStyleSheet("background-color: #bbc1cd; border: none;")
             self.setRenderHint(QPainter.Antialiasing)
             self.setDragMode(QGraphicsView.ScrollHandDrag)
             self.setTransformationAnchor(QGraphicsView.AnchorUnderMouse)
+            self.target_scale = 1.0
+            self.zoom_timer = QTimer(self)
+            self.zoom_timer.setInterval(16)
+            self.zoom_timer.timeout.connect(self._zoom_frame)
+
+        def visible_scene_rect(self):
+            return self.mapToScene(self.viewport().rect()).boundingRect()
+
+        def current_scale(self):
+            return self.transform().m11()
+
+        def zoom_to(self, scale):
+            self.target_scale = min(max(scale, self.MIN_SCALE), self.MAX_SCALE)
+            if not self.zoom_timer.isActive():
+                self.zoom_timer.start()
 
         def wheelEvent(self, event):
-            zoom_factor = 1.05
-            if event.angleDelta().y() > 0:
-                self.scale(zoom_factor, zoom_factor)
-            else:
-                if self.transform().m11() > 0.1:
-                    self.scale(1 / zoom_factor, 1 / zoom_factor)
+            # Wheel events only move the target; the timer applies it at most once per frame
+            notches = event.angleDelta().y() / 120
+            if notches:
+                base = self.target_scale if self.zoom_timer.isActive() else self.current_scale()
+                self.zoom_to(base * self.ZOOM_STEP ** notches)
+
+        def _zoom_frame(self):
+            current = self.current_scale()
+            scale = current + (self.target_scale - current) * self.ZOOM_EASE
+            if abs(self.target_scale - scale) < self.target_scale * 0.01:
+                scale = self.target_scale
+                self.zoom_timer.stop()
+            self.scale(scale / current, scale / current)
+            self.viewport_changed.emit()
+
+        def scrollContentsBy(self, dx, dy):
+            super().scrollContentsBy(dx, dy)
+            self.viewport_changed.emit()
+
+        def paintEvent(self, event):
+            start = time.perf_counter()
+            super().paintEvent(event)
+            frame_stats.painted(start, time.perf_counter())
+
+        def resizeEvent(self, event):
+            super().resizeEvent(event)
+            self.viewport_changed.emit()
+
+        def mousePressEvent(self, event):
+            self._press_pos = event.position()
+            super().mousePressEvent(event)
+
+        def mouseReleaseEvent(self, event):
+            super().mouseReleaseEvent(event)
+            press = getattr(self, "_press_pos", None)
+            if event.button() == Qt.LeftButton and press is not None:
+                if (event.position() - press).manhattanLength() < 4:
+                    self.clicked.emit(self.mapToScene(event.position().toPoint()))
 
     class ScoreEditor(QWidget):
+        PAGE_PRELOAD = 1 # Pages kept materialized beyond the visible ones
+        AUTOSAVE_MS = 5000
+        IMPORT_BUDGET = 0.008 # Seconds per frame spent moving imported notes into the score
+        BULK_EDIT_NOTES = 500 # Edits this large suspend the scene index while they run
+        import_finished = Signal(str) # Message for the user
+        clipboard = [] # copy_measure() notes, shared by all documents
+        THUMBNAIL_SCALE = 0.3 # Below this zoom pages are drawn as images, without note items
+
         def __init__(self, parent=None):
             super().__init__(parent)
             self.layout = QVBoxLayout(self)
@@ -330,7 +2843,7 @@ def main():
             self.layout.setSpacing(0)
             self._setup_toolbar()
             
-            self.scene = QGraphicsScene()
+            self.scene = QGraphicsScene(self) # Goes with the editor when a document is released
             self.scene.setSceneRect(-2500, -2500, 5000, 5000)
             
             self.view = InteractiveView(self.scene)
@@ -338,15 +2851,38 @@ def main():
             
             self.cursor = None 
             self.paper = None
+            self.pages = {} # Materialized pages only: page index -> PageItem
+            self.page_count = 0 # Pages in the layout, materialized or not
+            self.score = Score()
+            self.score_layout = ScoreLayout(self.score)
+            self.journal = EditJournal()
+            self.autosave = None # Set once the score has a file
+            self.scores_dir = SCORES_DIR # Where save() puts a score that has no file yet
+            self.import_job = None
+            self._saved_version = self.score.version
+            self.note_items = {} # note id -> scene item, for notes on materialized pages
+            self.cursor_tick = 0
+            self.cursor_step = TOP_LINE_STEP - 4 # Middle line
+            self._virtualize_pending = False
+            self._scroll_pending = False
+            self.thumbnails = False
             
-            self.renderer_up = QSvgRenderer(str(ASSETS_DIR / "quarter_note_up.svg"))
-            self.renderer_down = QSvgRenderer(str(ASSETS_DIR / "quarter_note_down.svg"))
-
-            self.renderer_treble = QSvgRenderer(str(ASSETS_DIR / "treble.svg"))
+            with PROFILER.phase("renderer loading"):
+                for glyph, name in GLYPH_FILES.items():
+                    glyph_cache.load(glyph, ASSETS_DIR / name)
 
-            self._draw_paper_and_staves()
-            self._create_cursor()
-            self.render_treble()
+            with PROFILER.phase("_draw_paper_and_staves"):
+                self._draw_paper_and_staves()
+            with PROFILER.phase("cursor"):
+                self._create_cursor()
+            self.view.viewport_changed.connect(self._schedule_virtualize)
+            self.view.clicked.connect(self.set_cursor_at)
+            self.import_timer = QTimer(self)
+            self.import_timer.setInterval(16)
+            self.import_timer.timeout.connect(self._drain_import)
+            self.autosave_timer = QTimer(self)
+            self.autosave_timer.timeout.connect(self._autosave)
+            self.autosave_timer.start(self.AUTOSAVE_MS)
 
         def _setup_toolbar(self):
             top_bar = QWidget()
@@ -359,74 +2895,630 @@ def main():
             self.layout.addWidget(top_bar)
 
         def _draw_paper_and_staves(self):
-            PAPER_W, PAPER_H = 794, 1123
-            MARGIN_X, MARGIN_Y = 50, 100
-            LINE_SPACING = 10
-            SYSTEM_GAP = 80
-            
-            self.paper = QGraphicsRectItem(0, 0, PAPER_W, PAPER_H)
-            self.paper.setBrush(QBrush(QColor("White")))
-            self.scene.addItem(self.paper)
-            
+            self._relayout()
+            self.paper = self._materialize_page(0)
             self.view.centerOn(self.paper)
 
-            current_y = MARGIN_Y
-            for _ in range(8):
-                for i in range(5):
-                    y = current_y + (i * LINE_SPACING)
-                    line = QGraphicsLineItem(MARGIN_X, y, PAPER_W - MARGIN_X, y)
-                    line.setPen(QPen(Qt.GlobalColor.black, 1))
-                    line.setZValue(1)
-                    line.setParentItem(self.paper)
-                current_y += (4 * LINE_SPACING) + SYSTEM_GAP
-        
-        def add_note(self, x, y, stem="up"):
-            note_item = QGraphicsSvgItem()
-            
-            # Select the correct renderer based on the argument
-            if stem == "down":
-                note_item.setSharedRenderer(self.renderer_down)
+        def _measure_count(self):
+            # Everything up to the cursor gets laid out, even when it is still empty
+            return max(self.score.measure_count(), self.cursor_tick // MEASURE_TICKS + 1)
+
+        @TRACER.traced("relayout")
+        def _relayout(self):
+            changed = self.score_layout.update(self._measure_count())
+            self._set_page_count(self.score_layout.page_count())
+            if changed is None:
+                return
+            first, end = changed
+            # Items still sit where the old layout put them; a note may now belong on a page that
+            # is not materialized, where no span below reaches it
+            owned = []
+            for index, page in list(self.pages.items()):
+                page_first = index * SYSTEMS_PER_PAGE
+                lo, hi = max(first, page_first), min(end, page_first + SYSTEMS_PER_PAGE)
+                if lo >= hi:
+                    continue
+                owned.extend(child for child in page.childItems() if getattr(child, "note_id", None) is not None)
+                page.set_systems(self._page_systems(index))
+                if self.thumbnails:
+                    page.set_heads(self._page_heads(index))
+                    continue
+                hi = min(hi, self.score_layout.system_count())
+                if lo < hi:
+                    start = self.score_layout.system_starts[lo] * MEASURE_TICKS
+                    stop = self.score_layout.system_measures(hi - 1)[1] * MEASURE_TICKS
+                    self._place_notes(*self.score.span(start, stop))
+            for item in owned:
+                if self.note_items.get(item.note_id) is item:
+                    self._place_item(self.score.note(self.score.find(item.tick, item.note_id)), item)
+
+        def _place_notes(self, lo, hi):
+            # Move items of notes whose system changed; create or drop them when they change page
+            for i in range(lo, hi):
+                note = self.score.note(i)
+                item = self.note_items.get(note.id)
+                if item is None:
+                    if self._page_of_tick(note.tick) in self.pages:
+                        self._render_note(note)
+                    continue
+                self._place_item(note, item)
+
+        def _place_item(self, note, item):
+            index, x, y = self._note_pos(note.tick, note.step, item.stem)
+            page = self.pages.get(index)
+            if page is None:
+                del self.note_items[note.id]
+                self.scene.removeItem(item)
+                return
+            if item.parentItem() is not page:
+                item.setParentItem(page)
+            item.setPos(x, y)
+
+        def _set_page_count(self, count):
+            # Pages are plain layout data until they come near the viewport
+            if count == self.page_count:
+                return
+            self.page_count = count
+            for index in [index for index in self.pages if index >= count]:
+                self._release_page(index)
+            # Keep the old 2500px of pasteboard around the pages
+            bottom = count * (PAPER_H + PAGE_GAP)
+            self.scene.setSceneRect(-2500, -2500, 5000, max(5000, bottom + 5000))
+            self._schedule_virtualize()
+
+        def _page_systems(self, index):
+            first = index * SYSTEMS_PER_PAGE
+            last = min(first + SYSTEMS_PER_PAGE, self.score_layout.system_count())
+            return [self.score_layout.system_geometry(system) for system in range(first, last)]
+
+        def _materialize_page(self, index):
+            page = self.pages.get(index)
+            if page is not None:
+                return page
+            page = PageItem()
+            page.setPos(0, index * (PAPER_H + PAGE_GAP))
+            page.set_systems(self._page_systems(index))
+            self.scene.addItem(page)
+            self.pages[index] = page
+            if self.thumbnails:
+                page.set_heads(self._page_heads(index))
+                return page
+            lo, hi = self.score.span(*self.score_layout.page_ticks(index))
+            for i in range(lo, hi):
+                self._render_note(self.score.note(i))
+            return page
+
+        def _page_heads(self, index):
+            lo, hi = self.score.span(*self.score_layout.page_ticks(index))
+            return [self.score_layout.head_pos(self.score.ticks[i], self.score.steps[i])[1:] for i in range(lo, hi)]
+
+        def _release_page(self, index):
+            page = self.pages.pop(index)
+            if self.cursor is not None and self.cursor.parentItem() is page:
+                self.cursor.setParentItem(None)
+            for child in page.childItems():
+                self.note_items.pop(getattr(child, "note_id", None), None)
+            self.scene.removeItem(page) # Takes its children with it
+
+        def _schedule_virtualize(self):
+            # Coalesce scroll/zoom/resize bursts into one pass per event loop turn
+            if not self._virtualize_pending:
+                self._virtualize_pending = True
+                QTimer.singleShot(0, self._update_materialized)
+
+        @TRACER.traced("materialize pages")
+        def _update_materialized(self):
+            self._virtualize_pending = False
+            rect = self.view.visible_scene_rect()
+            pitch = PAPER_H + PAGE_GAP
+            first = max(0, int(rect.top() // pitch) - self.PAGE_PRELOAD)
+            last = min(self.page_count - 1, int(rect.bottom() // pitch) + self.PAGE_PRELOAD)
+            cursor_page = self._page_of_tick(self.cursor_tick)
+            thumbnails = self.view.current_scale() < self.THUMBNAIL_SCALE
+            if thumbnails != self.thumbnails:
+                # Switching detail level rebuilds the materialized pages in the other mode
+                self.thumbnails = thumbnails
+                for index in list(self.pages):
+                    self._release_page(index)
+                self._attach_cursor()
+            for index in list(self.pages):
+                # Hysteresis: release only well outside the preload band
+                far = index < first - self.PAGE_PRELOAD or index > last + self.PAGE_PRELOAD
+                if far and index != cursor_page:
+                    self._release_page(index)
+            for index in range(first, last + 1):
+                self._materialize_page(index)
+
+        def _page_of_tick(self, tick):
+            return self.score_layout.system_of(tick // MEASURE_TICKS) // SYSTEMS_PER_PAGE
+
+        def _note_pos(self, tick, step, stem):
+            page, x, y = self.score_layout.head_pos(tick, step)
+            head_x, head_y = NOTE_HEADS[stem]
+            return page, x - head_x, y - head_y
+
+        def _head_rect(self, stem):
+            # Notehead in unscaled glyph coordinates, about a stave space tall
+            head_x, head_y = NOTE_HEADS[stem]
+            return QRectF((head_x - 6.5) / NOTE_SCALE, (head_y - 5) / NOTE_SCALE, 13 / NOTE_SCALE, 10 / NOTE_SCALE)
+
+        def _apply_delta(self, op, note):
+            # The one path that changes the model; edits, undo and redo all come through here
+            if op == EditJournal.INSERT:
+                self.score.insert(note.tick, note.step, note.duration, note.alter, note.voice, note.stem, note.id)
             else:
-                note_item.setSharedRenderer(self.renderer_up)
-            
-            # Scale adjustment (SVGs are 100x120, stave space is ~10px)
-            note_item.setScale(0.4)
+                self.score.remove(note.tick, note.id)
+                item = self.note_items.pop(note.id, None)
+                if item is not None:
+                    self.scene.removeItem(item)
+            # Only this measure's spacing is stale; _relayout() places (or creates) the note's item
+            self.score_layout.invalidate(note.tick // MEASURE_TICKS)
+            if self.autosave is not None:
+                self.autosave.record(op, note)
+
+        def add_note(self, tick, step, duration=TICKS_PER_QUARTER, alter=0, voice=0, stem=0):
+            note = Note(self.score.next_id, tick, duration, step, alter, voice, stem)
+            self._apply_delta(EditJournal.INSERT, note)
+            self.journal.record(EditJournal.INSERT, note)
+            self._relayout()
+            return note.id
+
+        def add_notes(self, notes, undoable=True):
+            # Bulk add_note for paste, import and generated notes: (tick, step[, duration, alter, voice, stem])
+            # tuples go into the model in one pass, with one undo entry and one relayout for all of them
+            notes = list(notes)
+            with self._bulk_edit(len(notes)):
+                ids = self._insert_notes(notes, undoable)
+                self._relayout()
+            return ids
+
+        def _insert_notes(self, notes, undoable):
+            defaults = (TICKS_PER_QUARTER, 0, 0, 0)
+            rows = [tuple(note) + defaults[len(note) - 2:] + (None,) for note in notes]
+            ids = self.score.insert_many(rows)
+            inserted = [Note(note_id, tick, duration, step, alter, voice, stem)
+                        for note_id, (tick, step, duration, alter, voice, stem, _) in zip(ids, rows)]
+            for measure in {note.tick // MEASURE_TICKS for note in inserted}:
+                self.score_layout.invalidate(measure)
+            if self.autosave is not None:
+                for note in inserted:
+                    self.autosave.record(EditJournal.INSERT, note)
+            if undoable:
+                self.journal.record_batch(EditJournal.INSERT, inserted)
+            return ids
+
+        def _bulk_edit(self, count):
+            # For `count` notes or more, the scene's BSP index is rebuilt once at the end instead of being
+            # updated for every item. The rebuild costs O(scene items), so smaller edits keep the normal path.
+            from contextlib import contextmanager, nullcontext
+            if count < self.BULK_EDIT_NOTES:
+                return nullcontext()
+            @contextmanager
+            def suspended():
+                self.scene.setItemIndexMethod(QGraphicsScene.NoIndex)
+                self.view.setUpdatesEnabled(False)
+                try:
+                    yield
+                finally:
+                    self.scene.setItemIndexMethod(QGraphicsScene.BspTreeIndex)
+                    self.view.setUpdatesEnabled(True)
+            return suspended()
+
+        def follow_playhead(self, tick):
+            # Playback moves the cursor slot by slot, and _place_cursor() keeps it in view
+            tick = int(tick) - int(tick) % SLOT_TICKS
+            if tick != self.cursor_tick:
+                self.cursor_tick = tick
+                self._place_cursor()
+
+        def copy_measure(self):
+            # The cursor's measure, with ticks relative to its start
+            start = self.cursor_tick - self.cursor_tick % MEASURE_TICKS
+            lo, hi = self.score.span(start, start + MEASURE_TICKS)
+            ScoreEditor.clipboard = [(note.tick - start, note.step, note.duration, note.alter, note.voice, note.stem)
+                              for note in map(self.score.note, range(lo, hi))]
+
+        def paste_measure(self):
+            start = self.cursor_tick - self.cursor_tick % MEASURE_TICKS
+            self.add_notes([(start + note[0],) + note[1:] for note in self.clipboard])
+
+        def remove_note(self, tick, note_id):
+            note = self.score.note(self.score.find(tick, note_id))
+            self._apply_delta(EditJournal.REMOVE, note)
+            self.journal.record(EditJournal.REMOVE, note)
+            self._relayout()
+
+        def delete_at_cursor(self):
+            lo, hi = self.score.span(self.cursor_tick, self.cursor_tick + 1)
+            for i in range(lo, hi):
+                if self.score.steps[i] == self.cursor_step:
+                    self.remove_note(self.cursor_tick, self.score.ids[i])
+                    return
+
+        def _set_score(self, score, autosave):
+            self.save()
+            self._cancel_import()
+            self.score = score
+            self.autosave = autosave
+            self._saved_version = score.version
+            self.journal = EditJournal()
+            self.cursor_tick = 0
+            self.render_notes()
+
+        def suspend(self):
+            # What a document keeps while its scene is released: the model, its history and where the user was
+            self.save()
+            self.autosave_timer.stop()
+            return SimpleNamespace(score=self.score, autosave=self.autosave, journal=self.journal,
+                                   saved_version=self._saved_version, cursor=(self.cursor_tick, self.cursor_step),
+                                   scale=self.view.current_scale(),
+                                   center=self.view.mapToScene(self.view.viewport().rect().center()))
+
+        def resume(self, state):
+            self.score, self.autosave, self.journal = state.score, state.autosave, state.journal
+            self._saved_version = state.saved_version
+            self.cursor_tick, self.cursor_step = state.cursor
+            self.view.setTransform(QTransform.fromScale(state.scale, state.scale))
+            self.view.target_scale = state.scale
+            self.render_notes()
+            self.view.centerOn(state.center)
+
+        def shutdown(self):
+            # Last chance to write the score before the editor goes away
+            self.save()
+            self._cancel_import()
+
+        def title(self):
+            if "title" in self.score.meta:
+                return self.score.meta["title"]
+            return self.autosave.path.stem if self.autosave is not None else "Untitled"
+
+        @TRACER.traced("open score")
+        def open_score(self, path):
+            score, generation = load_score(path)
+            self._set_score(score, ScoreAutosave(path, generation))
+
+        def import_score(self, path):
+            # The first batches show up while the rest is still being parsed
+            score = Score()
+            score.meta["title"] = Path(path).stem
+            self._set_score(score, None)
+            self.import_job = ImportJob(path).start()
+            self.import_timer.start()
+
+        def _cancel_import(self):
+            if self.import_job is not None:
+                self.import_job.cancelled = True
+                self.import_job = None
+                self.import_timer.stop()
+
+        @TRACER.traced("drain import")
+        def _drain_import(self):
+            job = self.import_job
+            deadline = time.perf_counter() + self.IMPORT_BUDGET
+            if not job.batches.empty():
+                batch = job.batches.get_nowait()
+                with self._bulk_edit(len(batch)):
+                    while True:
+                        self._insert_notes(batch, undoable=False)
+                        if job.batches.empty() or time.perf_counter() >= deadline:
+                            break
+                        batch = job.batches.get_nowait()
+                    self._relayout()
+            if job.done.is_set() and job.batches.empty():
+                self.import_timer.stop()
+                self.import_job = None
+                if job.error is not None:
+                    print(f"[main] Import of {job.path.name} failed: {job.error}", file=sys.stderr)
+                    self.import_finished.emit(f"Could not import {job.path.name}: {job.error}")
+                else:
+                    self.import_finished.emit(f"Imported {job.count} notes from {job.path.name}")
+                self.save()
+
+        @TRACER.traced("save")
+        def save(self):
+            # Full rewrite, folding the autosave journal into the score file
+            if self.import_job is not None:
+                return # Imported notes are not journaled; the file is written once the import is in
+            if self.autosave is None:
+                if not len(self.score):
+                    return
+                self.scores_dir.mkdir(parents=True, exist_ok=True)
+                path = new_score_path(self.score.meta.setdefault("title", "Untitled"), self.scores_dir)
+                self.autosave = ScoreAutosave(path, 0)
+            elif self.score.version == self._saved_version and not self.autosave.journal_bytes:
+                return
+            self.score.meta["pages"] = self.score_layout.page_count() # For the Home tab library
+            self.autosave.compact(self.score)
+            self._saved_version = self.score.version
+
+        @TRACER.traced("autosave")
+        def _autosave(self):
+            # Appends only the edits since the last tick; the whole file is rewritten once the journal grows
+            if self.autosave is None or self.autosave.needs_compaction():
+                self.save()
+            else:
+                self.autosave.flush()
+
+        def undo(self):
+            self._replay(self.journal.undo())
+
+        def redo(self):
+            self._replay(self.journal.redo())
+
+        def _replay(self, deltas):
+            with self._bulk_edit(len(deltas)):
+                for op, note in deltas:
+                    self._apply_delta(op, note)
+                # Items of a large redone paste are created here too, while the index is suspended
+                self._relayout()
+                if deltas:
+                    # The cursor follows the change, like it does when typing
+                    self.cursor_tick = note.tick
+                    self._place_cursor()
+
+        def render_notes(self):
+            # Rebuild from the model: drop every page and let the viewport pull back what it shows
+            for index in list(self.pages):
+                self._release_page(index)
+            self.score_layout = ScoreLayout(self.score)
+            self._relayout()
+            self._place_cursor()
+            self._schedule_virtualize()
+
+        def _render_note(self, note):
+            stem = note_stem(note.step, note.stem)
+            note_item = GlyphItem(f"note_{stem}")
+            note_item.note_id = note.id
+            note_item.tick = note.tick # Notes never move in time; edits remove and insert
+            note_item.stem = stem
+            note_item.head = self._head_rect(stem)
+            note_item.setScale(NOTE_SCALE)
+            page, x, y = self._note_pos(note.tick, note.step, stem)
             note_item.setPos(x, y)
-            note_item.setParentItem(self.paper)
+            note_item.setParentItem(self.pages[page])
             note_item.setZValue(5)
-
-        def render_treble(self):
-            treble_item = QGraphicsSvgItem()
-            treble_item.setSharedRenderer(self.renderer_treble)
-            treble_item.setScale(0.068)
-            treble_item.setPos(51, 94.7)
-            treble_item.setParentItem(self.paper)
-            treble_item.setZValue(5)
+            self.note_items[note.id] = note_item
 
         def _create_cursor(self):
-            self.cursor = QGraphicsSvgItem()
-            self.cursor.setSharedRenderer(self.renderer_down)
-            self.cursor.setScale(0.4)
-            self.cursor.setPos(80, 81.8)
-            self.cursor.setParentItem(self.paper)
+            self.cursor = GlyphItem("note_down")
+            self.cursor.head = self._head_rect("down")
+            self.cursor.setScale(NOTE_SCALE)
             self.cursor.setZValue(6)
-            self.scene.addItem(self.cursor)
+            self._place_cursor()
+
+        def _place_cursor(self):
+            self._relayout()
+            self._attach_cursor()
+            # One scroll per event-loop pass, however many moves land in it
+            if not self._scroll_pending:
+                self._scroll_pending = True
+                QTimer.singleShot(0, self._scroll_to_cursor)
+
+        def _attach_cursor(self):
+            index, x, y = self._note_pos(self.cursor_tick, self.cursor_step, "down")
+            page = self._materialize_page(index)
+            if self.cursor.parentItem() is not page:
+                self.cursor.setParentItem(page)
+            self.cursor.setPos(x, y)
+
+        def _scroll_to_cursor(self):
+            self._scroll_pending = False
+            self.view.ensureVisible(self.cursor)
 
-        def move_cursor_horizontal(self, amount):
+        def move_cursor_horizontal(self, ticks):
             if self.cursor:
-                self.cursor.setX(self.cursor.x() + amount)
-                self.view.ensureVisible(self.cursor)
+                tick = max(0, self.cursor_tick + ticks)
+                self.cursor_tick = tick - tick % SLOT_TICKS
+                self._place_cursor()
 
-        def move_cursor_vertical(self, amount):
+        def move_cursor_vertical(self, steps):
             if self.cursor:
-                self.cursor.setY(self.cursor.y() + amount)
-                self.view.ensureVisible(self.cursor)
+                self.cursor_step = min(max(self.cursor_step + steps, STEP_MIN), STEP_MAX)
+                self._place_cursor()
+
+        def set_cursor_at(self, scene_pos):
+            # Snap a click to (system, line/space, slot) through the layout tables, not scene.items()
+            page = int(scene_pos.y() // (PAPER_H + PAGE_GAP))
+            if not 0 <= page < self.page_count or not 0 <= scene_pos.x() <= PAPER_W:
+                return
+            hit = self.score_layout.hit_test(page, scene_pos.x(), scene_pos.y() - page * (PAPER_H + PAGE_GAP))
+            if hit is not None:
+                _, self.cursor_step, self.cursor_tick = hit
+                self.journal.seal()
+                self._place_cursor()
+
+
+    class ScoreTabs(QTabWidget):
+        # Open documents. Only the shown one is sure to have a scene: one left in the background for
+        # IDLE_RELEASE_MS keeps just its model, and gets a fresh editor when it is shown again
+        IDLE_RELEASE_MS = 2 * 60 * 1000
+        notice = Signal(str) # import_finished of any document
+        editor_changed = Signal(object) # The shown ScoreEditor
+
+        def __init__(self, parent=None):
+            super().__init__(parent)
+            self.setDocumentMode(True)
+            self.setTabsClosable(True)
+            self.setMovable(True)
+            self.tabCloseRequested.connect(self.close_document)
+            self.currentChanged.connect(self._shown)
+            self.release_timer = QTimer(self)
+            self.release_timer.timeout.connect(self.release_idle)
+            self.release_timer.start(self.IDLE_RELEASE_MS // 8)
+
+        def current(self):
+            page = self.currentWidget()
+            return page.editor if page is not None else None
+
+        def editors(self):
+            return [self.widget(i).editor for i in range(self.count()) if self.widget(i).editor is not None]
+
+        def new_document(self):
+            # The shown document is reused while it is still blank and has never been saved
+            editor = self.current()
+            if editor is None or len(editor.score) or editor.autosave is not None or editor.import_job is not None:
+                editor = self._add_page()
+            return editor
+
+        def _add_page(self):
+            editor = ScoreEditor()
+            page = QWidget()
+            page_layout = QVBoxLayout(page)
+            page_layout.setContentsMargins(0, 0, 0, 0)
+            page.editor, page.state, page.hidden_at = None, None, None
+            self._attach(page, editor)
+            self.setCurrentIndex(self.addTab(page, "Untitled"))
+            return editor
+
+        def open_document(self, path):
+            for i in range(self.count()):
+                page = self.widget(i)
+                autosave = page.editor.autosave if page.editor is not None else page.state.autosave
+                if autosave is not None and autosave.path.resolve() == Path(path).resolve():
+                    self.setCurrentIndex(i)
+                    return page.editor
+            editor = self.new_document()
+            editor.open_score(path)
+            self.retitle(editor)
+            return editor
+
+        def retitle(self, editor):
+            for i in range(self.count()):
+                if self.widget(i).editor is editor:
+                    self.setTabText(i, editor.title())
+
+        def _attach(self, page, editor):
+            page.editor = editor
+            page.layout().addWidget(editor)
+            editor.import_finished.connect(self.notice)
 
+        def _shown(self, index):
+            now = time.monotonic()
+            for i in range(self.count()):
+                page = self.widget(i)
+                if i != index:
+                    page.hidden_at = page.hidden_at or now
+                    continue
+                page.hidden_at = None
+                if page.editor is None:
+                    editor = ScoreEditor()
+                    editor.resume(page.state)
+                    page.state = None
+                    self._attach(page, editor)
+            self.editor_changed.emit(self.current())
+
+        def release_idle(self):
+            now = time.monotonic()
+            for i in range(self.count()):
+                page = self.widget(i)
+                editor = page.editor
+                if editor is None or page.hidden_at is None or editor.import_job is not None:
+                    continue
+                if (now - page.hidden_at) * 1000 >= self.IDLE_RELEASE_MS:
+                    page.state = editor.suspend()
+                    page.editor = None
+                    editor.deleteLater() # Takes the view, the scene and every item with it
+
+        def close_document(self, index):
+            page = self.widget(index)
+            if page.editor is not None:
+                page.editor.shutdown()
+            if self.count() == 1:
+                self._add_page() # Never without a document; New Score reuses this blank one
+            self.removeTab(self.indexOf(page))
+            page.deleteLater()
+
+        def save_all(self):
+            for editor in self.editors():
+                editor.save()
+
+    class Player(QObject):
+        # Space plays the shown score from the cursor. A Playback thread synthesizes; this only copies finished
+        # blocks into the audio device and moves the cursor along with what the device has played
+        FEED_MS = 10
+        BUFFER = 0.1 # Seconds queued in the device: more survives longer stalls, less follows the cursor closer
+        notice = Signal(str)
+
+        def __init__(self, parent=None):
+            super().__init__(parent)
+            self.job = self.sink = self.io = self.editor = None
+            self.pending = b"" # Part of a block the device had no room for
+            self.timer = QTimer(self)
+            self.timer.setInterval(self.FEED_MS)
+            self.timer.timeout.connect(self._feed)
+
+        def toggle(self, editor):
+            if self.job is not None:
+                self.stop()
+            else:
+                self.play(editor)
+
+        def play(self, editor):
+            try:
+                from PySide6.QtMultimedia import QAudioFormat, QAudioSink, QMediaDevices
+            except ImportError as e: # QtMultimedia needs system audio libraries the rest of the app does not
+                print(f"[main] Playback unavailable: {e}", file=sys.stderr)
+                self.notice.emit("Playback is not available on this system")
+                return
+            device = QMediaDevices.defaultAudioOutput()
+            if device.isNull():
+                self.notice.emit("No audio output device")
+                return
+            audio_format = QAudioFormat()
+            audio_format.setSampleRate(SAMPLE_RATE)
+            audio_format.setChannelCount(1)
+            audio_format.setSampleFormat(QAudioFormat.Int16)
+            self.sink = QAudioSink(device, audio_format, self)
+            self.sink.setBufferSize(round(SAMPLE_RATE * self.BUFFER) * 2)
+            self.editor = editor
+            self.job = Playback(editor.score, editor.cursor_tick).start()
+            self.io = self.sink.start()
+            if self.io is None:
+                self.stop()
+                self.notice.emit("Could not open the audio output")
+                return
+            self.timer.start()
+
+        def stop(self):
+            if self.job is None:
+                return
+            self.timer.stop()
+            self.job.cancelled = True
+            self.sink.stop()
+            self.sink.deleteLater()
+            self.job = self.sink = self.io = self.editor = None
+            self.pending = b""
+
+        def _feed(self):
+            job = self.job
+            free = self.sink.bytesFree()
+            while free > 0:
+                if not self.pending:
+                    if job.blocks.empty():
+                        break
+                    self.pending = job.blocks.get_nowait()
+                written = self.io.write(self.pending[:free])
+                if written <= 0:
+                    break
+                self.pending = self.pending[written:]
+                free -= written
+            heard = self.sink.processedUSecs() / 1e6 * job.sample_rate
+            self.editor.follow_playhead(job.start_tick + heard / job.samples_per_tick)
+            drained = self.sink.bytesFree() >= self.sink.bufferSize()
+            if job.done.is_set() and job.blocks.empty() and not self.pending and drained:
+                if job.error is not None:
+                    print(f"[main] Playback failed: {job.error}", file=sys.stderr)
+                    self.notice.emit(f"Playback failed: {job.error}")
+                self.stop()
 
     # -- Application Execution --
-    app = QApplication(sys.argv)
+    with PROFILER.phase("QApplication"):
+        app = QApplication(sys.argv)
+    glyph_cache = GlyphCache()
+    frame_stats = FrameStats()
     
-    global_listener = GlobalInput()
+    global_listener = GlobalInput(load_key_bindings())
     app.installEventFilter(global_listener)
 
     app.setStyleSheet("""
@@ -449,19 +3541,27 @@ def main():
     view_switcher = QStackedWidget()
 
     # Navigation Bar
-    nav_bar = get_nav_bar(view_switcher)
+    with PROFILER.phase("get_nav_bar"):
+        nav_bar = get_nav_bar(view_switcher)
 
     # View > Home
-    home = get_home(view_switcher, nav_bar)
+    with PROFILER.phase("get_home"):
+        home = get_home()
     view_switcher.addWidget(home)
 
-    # View > Score
-    score_editor = ScoreEditor()
-    score_editor.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
-    view_switcher.addWidget(score_editor)
+    # View > Score: one tab per open document
+    documents = ScoreTabs()
+    documents.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+    with PROFILER.phase("ScoreEditor.__init__"):
+        documents.new_document()
+    view_switcher.addWidget(documents)
+    global_listener.window = main_window
+    global_listener.score_view_active = lambda: view_switcher.currentWidget() is documents
 
     # View > Publish
-    view_switcher.addWidget(QLabel("Publish Page"))
+    with PROFILER.phase("get_publish"):
+        publish = get_publish(lambda: documents.current().score)
+    view_switcher.addWidget(publish)
     
     # Arrangement
     layout.addWidget(nav_bar)
@@ -469,24 +3569,169 @@ def main():
     layout.setStretch(1, 1) 
 
     # Connector
-    def handle_global_command(cmd):
-        if view_switcher.currentWidget() == score_editor:
+    def show_editor():
+        view_switcher.setCurrentWidget(documents)
+        nav_bar.button_group.button(1).setChecked(True)
+
+    def import_score():
+        path, _ = QFileDialog.getOpenFileName(main_window, "Import Score", "",
+                                              "MusicXML or MIDI (*.musicxml *.xml *.mxl *.mid *.midi)")
+        if path:
+            editor = documents.new_document()
+            editor.import_score(path)
+            documents.retitle(editor)
+            show_editor()
+
+    def new_score():
+        documents.new_document()
+        show_editor()
+
+    def show_notice(message):
+        nav_bar.notice_label.setText(message)
+        nav_bar.notice_label.show()
+
+    perf_hud = PerfHUD(documents.current().view)
+    perf_hud.set_enabled(os.environ.get("ZUOYUEQU_HUD") == "1")
+    documents.editor_changed.connect(lambda editor: perf_hud.attach(editor.view))
+
+    def open_from_library(index):
+        documents.open_document(index.data(Qt.UserRole))
+        show_editor()
+
+    def view_switched(index):
+        if view_switcher.widget(index) is home:
+            home.refresh() # Picks up scores saved since; unchanged files are only stat()ed
+
+    player = Player(main_window)
+    player.notice.connect(show_notice)
+    documents.editor_changed.connect(lambda editor: player.stop()) # Playback belongs to the document it started in
+    app.aboutToQuit.connect(player.stop)
+
+    home.new_score_button.clicked.connect(new_score)
+    home.import_button.clicked.connect(import_score)
+    home.library.activated.connect(open_from_library)
+    view_switcher.currentChanged.connect(view_switched)
+    documents.notice.connect(show_notice)
+
+    @TRACER.traced("handle_global_command", "input")
+    def handle_global_command(cmd, count):
+        if cmd == "QUIT":
+            app.quit()
+        elif cmd == "HUD":
+            perf_hud.toggle()
+        elif cmd == "OPEN":
+            path, _ = QFileDialog.getOpenFileName(main_window, "Open Score", str(SCORES_DIR), "Scores (*.zyq)")
+            if path:
+                documents.open_document(path)
+                show_editor()
+        elif cmd == "NEW":
+            new_score()
+        elif view_switcher.currentWidget() == documents:
+            score_editor = documents.current()
             if cmd == "UP":
-                score_editor.move_cursor_vertical(-5)
+                score_editor.move_cursor_vertical(count)
             elif cmd == "DOWN":
-                score_editor.move_cursor_vertical(5)
+                score_editor.move_cursor_vertical(-count)
+            elif cmd == "LEFT":
+                score_editor.move_cursor_horizontal(-count * SLOT_TICKS)
+            elif cmd == "RIGHT":
+                score_editor.move_cursor_horizontal(count * SLOT_TICKS)
             elif cmd == "ENTER":
-                score_editor.add_note(score_editor.cursor.x(), score_editor.cursor.y(), stem="down")
-                score_editor.move_cursor_horizontal(30)
+                for _ in range(count):
+                    score_editor.add_note(score_editor.cursor_tick, score_editor.cursor_step)
+                    score_editor.move_cursor_horizontal(TICKS_PER_QUARTER)
+            elif cmd == "DELETE":
+                score_editor.delete_at_cursor()
+            elif cmd == "UNDO":
+                for _ in range(count):
+                    score_editor.undo()
+            elif cmd == "REDO":
+                for _ in range(count):
+                    score_editor.redo()
+            elif cmd == "SAVE":
+                score_editor.save()
+                documents.retitle(score_editor)
+            elif cmd == "COPY":
+                score_editor.copy_measure()
+            elif cmd == "PASTE":
+                score_editor.paste_measure()
+            elif cmd == "CLOSE":
+                documents.close_document(documents.currentIndex())
+            elif cmd == "PLAY":
+                player.toggle(score_editor)
 
     global_listener.command.connect(handle_global_command)
+    app.aboutToQuit.connect(documents.save_all) # Fold the autosave journals in on the way out
+    app.aboutToQuit.connect(TRACER.write)
+
+    # Background update check (offline-first mode) reports here
+    if update_check is not None:
+        def poll_update_check():
+            if not update_check.done.is_set():
+                return
+            update_timer.stop()
+            if update_check.notice:
+                show_notice(update_check.notice)
+        update_timer = QTimer(main_window)
+        update_timer.timeout.connect(poll_update_check)
+        update_timer.start(1000)
 
     # Render
+    if PROFILER.enabled:
+        class FirstPaint(QObject):
+            # show() until the first paint of the window has been handled
+            def eventFilter(self, obj, event):
+                if event.type() == QEvent.Paint:
+                    main_window.removeEventFilter(self)
+                    QTimer.singleShot(0, self.done)
+                return False
+
+            def done(self):
+                PROFILER.record("show + first paint", show_start)
+                finish_startup_profile()
+                if "--profile-exit" in sys.argv:
+                    app.quit()
+        first_paint = FirstPaint(main_window)
+        main_window.installEventFilter(first_paint)
+        show_start = time.perf_counter()
+    if driver is None:
+        QTimer.singleShot(1000, home.refresh) # Index the library once startup is out of the way
+    else:
+        # Headless runs (--benchmark) drive the finished UI instead of a user
+        ui = SimpleNamespace(app=app, window=main_window, editor=documents.current(), show_editor=show_editor)
+        QTimer.singleShot(0, lambda: driver(ui))
     main_window.showMaximized()
     sys.exit(app.exec())
 
 if __name__ == "__main__":
-    bootstrapper()
-    asset_fetch()
-    sys.path.insert(0, str(PKG_DIR))
-    main()
+    if "--build-manifest" in sys.argv:
+        build_manifest(Path(__file__).resolve().parent)
+        sys.exit(0)
+    # --profile-startup[=out.json] [--profile-imports] [--profile-cprofile[=out.prof]] [--profile-exit]
+    PROFILER.enabled = _flag_value("--profile-startup", True) is not None
+    if PROFILER.enabled and "--profile-imports" in sys.argv:
+        PROFILER.trace_imports()
+    if PROFILER.enabled and _flag_value("--profile-cprofile", True):
+        PROFILER.start_cprofile()
+    update_check = None
+    offline_first = "--offline-first" in sys.argv or os.environ.get("ZUOYUEQU_OFFLINE_FIRST") == "1"
+    if offline_first and cache_is_valid() and not update_pending():
+        apply_staged_update()
+        update_check = UpdateCheck().start()
+    else:
+        with PROFILER.phase("bootstrapper"):
+            remote = bootstrapper()
+        if remote is not None:
+            with PROFILER.phase("asset_fetch"):
+                asset_fetch(remote)
+    activate_packages()
+    if _flag_value("--export", "pdf"):
+        sys.exit(export_cli())
+    if "--render-wav" in sys.argv:
+        sys.exit(render_wav_cli())
+    driver = None
+    if _flag_value("--benchmark", "benchmark.json"):
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        startup = benchmark_startup()
+        driver = lambda ui: run_benchmark(ui, startup)
+    main(update_check, driver)
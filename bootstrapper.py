@@ -1,5 +1,8 @@
 import hashlib
+import json
 import os
+import platform
+import shutil
 import sys
 import subprocess
 from pathlib import Path
@@ -11,11 +14,24 @@ REQUIREMENTS = [
 
 
 PKG_DIR = Path(__file__).resolve().parent / "_pkgs"
-MARKER = PKG_DIR / ".requirements.hash"
+STORE_DIR = PKG_DIR / "store" # one --target tree per requirement, named by its hash
+ACTIVE = PKG_DIR / "active.json" # store keys on sys.path, replaced atomically
+WHEELS = Path(__file__).resolve().parent / "_wheels"
 
-def _hash_requirements(reqs):
-    canon = "\n".join(sorted(reqs)).encode("utf-8")
-    return hashlib.sha256(canon).hexdigest()
+def _sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+def _sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _store_key(req):
+    # Same key as the main script's store, so both resolve a line to the same tree
+    tag = f"{sys.version_info[0]}.{sys.version_info[1]}|{sys.platform}|{platform.machine()}|{req.strip()}"
+    return _sha256(tag.encode("utf-8"))[:16]
 
 def _read_text(path):
     try:
@@ -25,7 +41,9 @@ def _read_text(path):
 
 def _write_text(path, s):
     path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(s, encoding="utf-8")
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(s, encoding="utf-8")
+    os.replace(tmp, path)
 
 def _have_pip():
     try:
@@ -47,30 +65,22 @@ def _ensure_pip():
         print("You may need to install pip for this Python.", file=sys.stderr)
         sys.exit(1)
 
-def _need_install():
-    want = _hash_requirements(REQUIREMENTS)
-    have = _read_text(MARKER)
-    if not PKG_DIR.exists():
-        return True
-    return want != have
-
-def _install():
-    if not _need_install():
-        return
-
-    _ensure_pip()
-
-    PKG_DIR.mkdir(parents=True, exist_ok=True)
+def _active_keys():
+    try:
+        return json.loads(_read_text(ACTIVE) or "[]")
+    except ValueError:
+        return []
 
-    print(f"[bootstrap] Installing to {PKG_DIR} ...")
-    cmd = [sys.executable, "-m", "pip", "install", "--upgrade", "--target", str(PKG_DIR)]
-    cmd += REQUIREMENTS
+def _need_install():
+    want = [_store_key(r) for r in REQUIREMENTS]
+    return want != _active_keys() or not all((STORE_DIR / k).exists() for k in want)
 
+def _pip(args):
     # TODO On some systems pip warns about script locations; that's harmless
     env = os.environ.copy()
     # TODO Avoid user site interfering
     env.setdefault("PYTHONNOUSERSITE", "1")
-
+    cmd = [sys.executable, "-m", "pip"] + args
     try:
         subprocess.run(cmd, check=True, env=env)
     except subprocess.CalledProcessError as e:
@@ -79,11 +89,81 @@ def _install():
         print("Return code:", e.returncode, file=sys.stderr)
         sys.exit(e.returncode)
 
-    _write_text(MARKER, _hash_requirements(REQUIREMENTS))
+def _wheel_index():
+    try:
+        return json.loads(_read_text(WHEELS / "index.json") or "")
+    except ValueError:
+        return {"wheels": {}, "requirements": {}}
+
+def _have_wheels(key, index):
+    files = index["requirements"].get(key)
+    if not files:
+        return False
+    return all((WHEELS / f).exists() and _sha256_file(WHEELS / f) == index["wheels"].get(f)
+               for f in files)
+
+def _fetch_wheels(req, key, index):
+    incoming = WHEELS / f".incoming-{os.getpid()}"
+    shutil.rmtree(incoming, ignore_errors=True)
+    _pip(["download", "--dest", str(incoming), "--find-links", str(WHEELS), req])
+    files = []
+    for path in sorted(incoming.iterdir()):
+        digest = _sha256_file(path)
+        if index["wheels"].get(path.name) != digest or not (WHEELS / path.name).exists():
+            os.replace(path, WHEELS / path.name)
+            index["wheels"][path.name] = digest
+        files.append(path.name)
+    shutil.rmtree(incoming, ignore_errors=True)
+    index["requirements"][key] = files
+    _write_text(WHEELS / "index.json", json.dumps(index, indent=1))
+
+def _install():
+    if not _need_install():
+        return
+
+    _ensure_pip()
+
+    STORE_DIR.mkdir(parents=True, exist_ok=True)
+    WHEELS.mkdir(parents=True, exist_ok=True)
+    index = _wheel_index()
+
+    keys = [_store_key(r) for r in REQUIREMENTS]
+    for req, key in zip(REQUIREMENTS, keys):
+        if (STORE_DIR / key).exists():
+            continue # unchanged, keep it
+        if not _have_wheels(key, index):
+            _fetch_wheels(req, key, index)
+        # Stage, then rename: a crash mid-install never leaves a half-filled tree in the store
+        staging = STORE_DIR / f"{key}.staging-{os.getpid()}"
+        shutil.rmtree(staging, ignore_errors=True)
+        print(f"[bootstrap] Installing {req} ...")
+        _pip(["install", "--no-index", "--find-links", str(WHEELS), "--target", str(staging), req])
+        os.replace(staging, STORE_DIR / key)
+
+    _write_text(ACTIVE, json.dumps(keys))
+
+    # Old trees, interrupted stagings and the pre-store flat layout
+    for path in STORE_DIR.iterdir():
+        if path.name not in keys:
+            shutil.rmtree(path, ignore_errors=True)
+    for path in PKG_DIR.iterdir():
+        if path not in (STORE_DIR, ACTIVE):
+            shutil.rmtree(path, ignore_errors=True) if path.is_dir() else path.unlink()
+    # Wheels only removed requirements used
+    index["requirements"] = {k: files for k, files in index["requirements"].items() if k in keys}
+    used = {name for files in index["requirements"].values() for name in files}
+    index["wheels"] = {name: digest for name, digest in index["wheels"].items() if name in used}
+    _write_text(WHEELS / "index.json", json.dumps(index, indent=1))
+    for path in WHEELS.iterdir():
+        if path.name != "index.json" and path.name not in used:
+            shutil.rmtree(path, ignore_errors=True) if path.is_dir() else path.unlink()
 
-    sys.path.insert(0, str(PKG_DIR)) # Fresh-installed packages TAKE PRIORITIEEEEEEEEEEEEEEEEEEEEEEEEE
     print("[bootstrap] Dependencies ready.")
 
+def _activate():
+    for key in reversed(_active_keys()):
+        sys.path.insert(0, str(STORE_DIR / key)) # Fresh-installed packages TAKE PRIORITIEEEEEEEEEEEEEEEEEEEEEEEEE
+
 def main():
     from PySide6.QtWidgets import QApplication, QLabel
     import sys
@@ -98,5 +178,6 @@ def main():
 
 if __name__ == "__main__":
     _install()
+    _activate()
     main()
 
@@ -0,0 +1,11 @@
+import importlib.util
+from pathlib import Path
+
+SCRIPT = Path(__file__).resolve().parent.parent / "1626_조원.py"
+
+def load_script():
+    # The script's name is not an identifier, so it cannot be imported by name
+    spec = importlib.util.spec_from_file_location("zuoyuequ", SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
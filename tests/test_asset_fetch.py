@@ -0,0 +1,106 @@
+import hashlib
+import tempfile
+import threading
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from pathlib import Path
+
+from _script import load_script
+
+zy = load_script()
+
+
+class RecordingHandler(SimpleHTTPRequestHandler):
+    # SimpleHTTPRequestHandler answers If-Modified-Since with 304, like the real asset server
+    def send_response(self, code, message=None):
+        self.server.log.append((self.path, code))
+        super().send_response(code, message)
+
+    def log_message(self, *args):
+        pass
+
+
+class AssetFetchTest(unittest.TestCase):
+    # asset_fetch() against a local stand-in for ZUOYUEQU_BASE_URL
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.served = root / "server"
+        (self.served / "assets").mkdir(parents=True)
+        for asset in zy.ASSETS:
+            (self.served / "assets" / asset).write_bytes(f"<svg>{asset}</svg>".encode("utf-8"))
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), partial(RecordingHandler, directory=str(self.served)))
+        self.server.log = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.saved = zy.ASSETS_DIR, zy.ASSET_MANIFEST, zy._http_pool
+        zy.ASSETS_DIR = root / "assets"
+        zy.ASSET_MANIFEST = zy.ASSETS_DIR / "assets.json"
+        zy._http_pool = zy.HttpPool(f"http://127.0.0.1:{self.server.server_address[1]}")
+
+    def tearDown(self):
+        zy._http_pool.close()
+        zy.ASSETS_DIR, zy.ASSET_MANIFEST, zy._http_pool = self.saved
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def fetch(self, remote=None):
+        self.server.log.clear()
+        with redirect_stdout(StringIO()), redirect_stderr(StringIO()):
+            zy.asset_fetch(remote)
+        return sorted(code for _, code in self.server.log)
+
+    def expire(self):
+        manifest = zy.read_asset_manifest()
+        for entry in manifest.values():
+            entry["checked"] = 0
+        zy.write_asset_manifest(manifest)
+
+    def remote(self):
+        return {"files": {f"assets/{asset}": hashlib.sha256((self.served / "assets" / asset).read_bytes()).hexdigest()
+                          for asset in zy.ASSETS}}
+
+    def test_first_fetch_then_fresh_then_revalidated(self):
+        self.assertEqual(self.fetch(), [200] * len(zy.ASSETS))
+        for asset in zy.ASSETS:
+            self.assertEqual((zy.ASSETS_DIR / asset).read_bytes(), (self.served / "assets" / asset).read_bytes())
+        self.assertEqual(self.fetch(), []) # Within ASSET_TTL nothing goes out
+        self.expire()
+        self.assertEqual(self.fetch(), [304] * len(zy.ASSETS))
+        self.assertTrue(all(entry["checked"] > 0 for entry in zy.read_asset_manifest().values()))
+
+    def test_manifest_hashes_decide(self):
+        self.fetch()
+        self.expire()
+        self.assertEqual(self.fetch(self.remote()), []) # Matching hashes need no request, however old the check
+        changed = zy.ASSETS[0]
+        (self.served / "assets" / changed).write_bytes(b"<svg>new</svg>")
+        self.assertEqual(self.fetch(self.remote()), [200])
+        self.assertEqual(self.server.log[0][0], f"/assets/{changed}")
+        self.assertEqual((zy.ASSETS_DIR / changed).read_bytes(), b"<svg>new</svg>")
+
+    def test_manifest_mismatch_fails(self):
+        remote = self.remote()
+        remote["files"][f"assets/{zy.ASSETS[0]}"] = "0" * 64
+        with self.assertRaises(SystemExit):
+            self.fetch(remote)
+        self.assertFalse((zy.ASSETS_DIR / zy.ASSETS[0]).exists())
+
+    def test_cached_copy_survives_failed_revalidation(self):
+        self.fetch()
+        cached = {asset: (zy.ASSETS_DIR / asset).read_bytes() for asset in zy.ASSETS}
+        self.expire()
+        self.server.shutdown()
+        self.server.server_close()
+        zy._http_pool.close()
+        self.fetch() # Connection refused for every asset, and no SystemExit
+        for asset in zy.ASSETS:
+            self.assertEqual((zy.ASSETS_DIR / asset).read_bytes(), cached[asset])
+            self.assertTrue(zy.asset_is_valid(asset, zy.read_asset_manifest().get(asset)))
+
+
+if __name__ == "__main__":
+    unittest.main()
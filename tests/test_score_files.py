@@ -0,0 +1,89 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from _script import load_script
+
+zy = load_script()
+
+
+class ScoreFileTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "score.zyq"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _score(self, count):
+        score = zy.Score()
+        score.meta["title"] = "Test"
+        for i in range(count):
+            score.insert(i * zy.SLOT_TICKS, zy.TOP_LINE_STEP - i % 8, zy.SLOT_TICKS)
+        return score
+
+    def _rows(self, score):
+        return [tuple(note) for note in score]
+
+    def test_save_and_load(self):
+        score = self._score(100)
+        zy.save_score(score, self.path, 7)
+        loaded, generation = zy.load_score(self.path)
+        self.assertEqual(generation, 7)
+        self.assertEqual(loaded.meta["title"], "Test")
+        self.assertEqual(loaded.next_id, score.next_id)
+        self.assertEqual(self._rows(loaded), self._rows(score))
+        self.assertEqual(loaded.measure_span(1), score.span(zy.MEASURE_TICKS, 2 * zy.MEASURE_TICKS))
+
+    def test_journal_replays_on_load(self):
+        score = self._score(10)
+        zy.save_score(score, self.path, 0)
+        autosave = zy.ScoreAutosave(self.path, 0)
+        note = zy.Note(score.next_id, 0, zy.SLOT_TICKS, zy.TOP_LINE_STEP, 0, 0, 0)
+        score.insert(note.tick, note.step, note.duration, note.alter, note.voice, note.stem, note.id)
+        autosave.record(zy.EditJournal.INSERT, note)
+        removed = score.note(5)
+        score.remove(removed.tick, removed.id)
+        autosave.record(zy.EditJournal.REMOVE, removed)
+        autosave.flush()
+        loaded, _ = zy.load_score(self.path)
+        self.assertEqual(self._rows(loaded), self._rows(score))
+
+    def test_stale_journal_is_dropped(self):
+        score = self._score(10)
+        zy.save_score(score, self.path, 0)
+        autosave = zy.ScoreAutosave(self.path, 0)
+        autosave.record(zy.EditJournal.INSERT, zy.Note(score.next_id, 0, zy.SLOT_TICKS, 30, 0, 0, 0))
+        autosave.flush()
+        zy.save_score(score, self.path, 1) # A compaction that crashed before unlinking the journal
+        loaded, _ = zy.load_score(self.path)
+        self.assertEqual(self._rows(loaded), self._rows(score))
+        self.assertFalse(zy._journal_path(self.path).exists())
+
+    def test_torn_journal_record_is_cut_before_appending(self):
+        score = self._score(10)
+        zy.save_score(score, self.path, 0)
+        autosave = zy.ScoreAutosave(self.path, 0)
+        first = zy.Note(score.next_id, 0, zy.SLOT_TICKS, 30, 0, 0, 0)
+        autosave.record(zy.EditJournal.INSERT, first)
+        autosave.flush()
+        with open(zy._journal_path(self.path), "ab") as f:
+            f.write(b"\x01\x00\x00") # Crash part way through the next record
+
+        loaded, generation = zy.load_score(self.path)
+        autosave = zy.ScoreAutosave(self.path, generation)
+        second = zy.Note(loaded.next_id, zy.SLOT_TICKS, zy.SLOT_TICKS, 31, 0, 0, 0)
+        loaded.insert(second.tick, second.step, second.duration, second.alter, second.voice, second.stem, second.id)
+        autosave.record(zy.EditJournal.INSERT, second)
+        autosave.flush()
+        self.assertEqual(autosave.journal_bytes, zy._journal_path(self.path).stat().st_size)
+
+        reloaded, _ = zy.load_score(self.path)
+        self.assertEqual(self._rows(reloaded), self._rows(loaded))
+        ids = set(reloaded.ids)
+        self.assertIn(first.id, ids)
+        self.assertIn(second.id, ids)
+
+
+if __name__ == "__main__":
+    unittest.main()